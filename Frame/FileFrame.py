@@ -7,6 +7,7 @@ matplotlib.use('WXAgg')
 from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg as FigureCanvas
 from matplotlib.figure import Figure
 from Panel.Menubar import MenuBar
+from Frame.ReportFrame.sae_sidecar import load_columns
 
 
 class FileFrame(wx.Frame):
@@ -255,8 +256,9 @@ class FileFrame(wx.Frame):
                 self.timer.Stop()
                 self.timer = None
 
-            # 엑셀 파일 읽기
-            self.df = pd.read_excel(file_path)
+            # 엑셀 파일 읽기 (변경되지 않은 파일은 sidecar 에서 memory-map)
+            columns, _ = load_columns(file_path, pd.read_excel, key="excel")
+            self.df = pd.DataFrame(columns)
 
             # 데이터 검증
             required_columns = ['time', 'ScheduledSpeed', 'SpeedFeedback']
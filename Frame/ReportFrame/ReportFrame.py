@@ -1,20 +1,23 @@
 import wx
 import numpy as np
-import pandas as pd
 import matplotlib
 import os
+import time
 
-from Frame.ReportFrame.SAE_J2951 import SAE_J2951
+from Frame.ReportFrame.sae_tolerance import DEFAULT_SPEED_TOL_KPH, DEFAULT_TIME_TOL_S
+from Frame.ReportFrame.sae_worker import AnalysisCancelled, AnalysisJob, AnalysisWorker, RescoreJob, \
+    can_rescore
 from Frame.ReportFrame.sae_report_generator import create_radar_chart, create_excel_report_from_template, \
     create_pdf_report
 from matplotlib.backends.backend_wxagg import FigureCanvasWxAgg as FigureCanvas
+from matplotlib.backends.backend_wxagg import NavigationToolbar2WxAgg as NavigationToolbar
 from matplotlib.figure import Figure
 from datetime import datetime
 
-from Panel.Menubar import MenuBar
-
 matplotlib.use('WXAgg')
 
+RESCORE_DELAY_MS = 150      # debounce for live re-scoring while typing
+
 class ReportFrame(wx.Frame):
     """메인 프레임"""
 
@@ -22,6 +25,7 @@ class ReportFrame(wx.Frame):
         super().__init__(parent=None, title="SAE J2951 Analyzer", size=(1400, 900))
 
         self.results = None
+        self.pyramids = None
         self.test_info = None
         self.time_data = None
         self.vsched_data = None
@@ -48,8 +52,14 @@ class ReportFrame(wx.Frame):
         right_sizer.Add(wx.StaticLine(right_panel), 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 10)
 
         # 메인: 레이더 차트
+        chart_sizer = wx.BoxSizer(wx.HORIZONTAL)
         self.radar_panel = RadarChartPanel(right_panel)
-        right_sizer.Add(self.radar_panel, 1, wx.EXPAND | wx.ALL, 10)
+        chart_sizer.Add(self.radar_panel, 1, wx.EXPAND | wx.ALL, 10)
+
+        # 누적 trace (CE, 거리, 속도 오차) — 긴 로그는 LOD pyramid 로 decimate
+        self.trace_panel = TracePanel(right_panel)
+        chart_sizer.Add(self.trace_panel, 1, wx.EXPAND | wx.ALL, 10)
+        right_sizer.Add(chart_sizer, 1, wx.EXPAND)
 
         right_panel.SetSizer(right_sizer)
         main_sizer.Add(right_panel, 1, wx.EXPAND | wx.ALL, 5)
@@ -62,19 +72,21 @@ class ReportFrame(wx.Frame):
         self.Centre()
 
 
-    def update_results(self, results, test_info, time_data, vsched_data, vroll_data):
-        """결과 업데이트"""
+    def update_results(self, results, test_info, time_data, vsched_data, vroll_data, pyramids=None):
+        """결과 업데이트 (pyramids: worker 에서 만든 trace LOD pyramid, 없으면 trace 생략)"""
         self.results = results
         self.test_info = test_info
         self.time_data = time_data
         self.vsched_data = vsched_data
         self.vroll_data = vroll_data
+        self.pyramids = pyramids
 
         # 요약 업데이트 (먼저)
         self.summary_panel.update_results(results)
 
         # 차트 업데이트
         self.radar_panel.update_chart(results)
+        self.trace_panel.update_traces(pyramids)
 
         self.SetStatusText(f"Analysis completed - DQM: {results.get('DQM', 0):.4f}")
 
@@ -196,6 +208,14 @@ class LeftPanel(wx.Panel):
     def __init__(self, parent, main_frame):
         super().__init__(parent)
         self.main_frame = main_frame
+        # 읽기 + 계산은 worker thread 에서 — 결과는 wx.CallAfter 로 main thread 에 반영
+        # result cache 는 쓰지 않음: cache hit 는 plain dict 라 speed profile / trace 가 없어 live rescore 와
+        # trace plot 이 안 됨. 다시 열 때는 sidecar (.npy memory-map) 덕에 파싱 없이 재계산만 함
+        self.worker = AnalysisWorker(
+            on_progress=lambda job, pct, msg: wx.CallAfter(self._on_job_progress, job, pct, msg),
+            on_done=lambda job, results, loaded, hit: wx.CallAfter(self._on_job_done, job, results, loaded, hit),
+            on_error=lambda job, exc: wx.CallAfter(self._on_job_error, job, exc))
+        self.Bind(wx.EVT_WINDOW_DESTROY, self._on_destroy)
         self.SetBackgroundColour(wx.Colour(240, 240, 240))
 
         main_sizer = wx.BoxSizer(wx.VERTICAL)
@@ -225,6 +245,27 @@ class LeftPanel(wx.Panel):
         self.load_btn.Bind(wx.EVT_BUTTON, self.on_load_file)
         file_sizer.Add(self.load_btn, 0, wx.EXPAND | wx.ALL, 5)
 
+        self.queue_btn = wx.Button(self, label="Queue Files...")
+        self.queue_btn.Bind(wx.EVT_BUTTON, self.on_queue_files)
+        file_sizer.Add(self.queue_btn, 0, wx.EXPAND | wx.ALL, 5)
+
+        # 진행률 (modal dialog 대신 — 분석 중에도 UI 사용 가능)
+        self.progress_gauge = wx.Gauge(self, range=100)
+        file_sizer.Add(self.progress_gauge, 0, wx.EXPAND | wx.ALL, 5)
+        self.progress_text = wx.StaticText(self, label="Idle")
+        file_sizer.Add(self.progress_text, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 5)
+
+        cancel_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        self.cancel_btn = wx.Button(self, label="Cancel")
+        self.cancel_btn.Bind(wx.EVT_BUTTON, self.on_cancel)
+        cancel_sizer.Add(self.cancel_btn, 1, wx.RIGHT, 5)
+        self.cancel_all_btn = wx.Button(self, label="Cancel All")
+        self.cancel_all_btn.Bind(wx.EVT_BUTTON, self.on_cancel_all)
+        cancel_sizer.Add(self.cancel_all_btn, 1)
+        file_sizer.Add(cancel_sizer, 0, wx.EXPAND | wx.ALL, 5)
+        self.cancel_btn.Enable(False)
+        self.cancel_all_btn.Enable(False)
+
         main_sizer.Add(file_sizer, 0, wx.EXPAND | wx.ALL, 10)
 
         # 2. 차량 파라미터
@@ -252,6 +293,16 @@ class LeftPanel(wx.Panel):
         grid.AddGrowableCol(1)
         param_sizer.Add(grid, 0, wx.EXPAND | wx.ALL, 5)
 
+        # 값 입력 중 debounce 후 force/work 단계만 worker 에서 다시 계산 (파일 재읽기 없음)
+        self._rescore_timer = None
+        self._rescore_job = None
+        for ctrl in (self.mass_ctrl, self.f0_ctrl, self.f1_ctrl, self.f2_ctrl):
+            ctrl.Bind(wx.EVT_TEXT, self.on_param_changed)
+
+        # Vroll 지연 자동 보정 (FFT cross-correlation)
+        self.align_check = wx.CheckBox(self, label="Auto-align Vroll lag")
+        param_sizer.Add(self.align_check, 0, wx.ALL, 5)
+
         main_sizer.Add(param_sizer, 0, wx.EXPAND | wx.ALL, 10)
 
         # 3. 테스트 정보
@@ -324,42 +375,27 @@ class LeftPanel(wx.Panel):
         if not filepath or not os.path.exists(filepath):
             wx.MessageBox("Please select a valid CSV file", "Error", wx.OK | wx.ICON_ERROR)
             return
+        self._submit([filepath])
 
+    def on_queue_files(self, event):
+        dlg = wx.FileDialog(self, "Choose CSV files", wildcard="CSV files (*.csv)|*.csv",
+                            style=wx.FD_OPEN | wx.FD_MULTIPLE | wx.FD_FILE_MUST_EXIST)
+        if dlg.ShowModal() == wx.ID_OK:
+            self._submit(dlg.GetPaths())
+        dlg.Destroy()
+
+    def _submit(self, paths):
+        """현재 파라미터로 파일들을 대기열에 추가"""
         try:
             mass_kg = float(self.mass_ctrl.GetValue())
             f0 = float(self.f0_ctrl.GetValue())
             f1 = float(self.f1_ctrl.GetValue())
             f2 = float(self.f2_ctrl.GetValue())
+        except ValueError as e:
+            wx.MessageBox(f"Invalid vehicle parameter:\n{str(e)}", "Error", wx.OK | wx.ICON_ERROR)
+            return
 
-            progress = wx.ProgressDialog(
-                "Loading",
-                "Reading CSV file...",
-                maximum=100,
-                parent=self,
-                style=wx.PD_APP_MODAL | wx.PD_AUTO_HIDE
-            )
-
-            progress.Update(20, "Reading CSV file...")
-
-            df = pd.read_csv(filepath, sep=None, engine="python")
-            cols = {c.lower(): c for c in df.columns}
-
-            time_col = cols.get("time") or cols.get("t") or "time"
-            vs_col = cols.get("vsched") or cols.get("vnom") or "Vsched"
-            vr_col = cols.get("vroll") or cols.get("vact") or "Vroll"
-
-            time_s = pd.to_numeric(df[time_col], errors="coerce").to_numpy()
-            Vs_kph = pd.to_numeric(df[vs_col], errors="coerce").to_numpy()
-            Vr_kph = pd.to_numeric(df[vr_col], errors="coerce").to_numpy()
-
-            progress.Update(50, "Calculating SAE J2951 metrics...")
-
-            ABCs_SI = np.array([f0, f1, f2])
-            calculator = SAE_J2951()
-            results = calculator.calculate(time_s, Vr_kph, Vs_kph, ABCs_SI, mass_kg)
-
-            progress.Update(80, "Updating display...")
-
+        for filepath in paths:
             test_info = {
                 'Test ID': self.test_id_ctrl.GetValue(),
                 'Vehicle ID': self.vehicle_ctrl.GetValue(),
@@ -371,23 +407,132 @@ class LeftPanel(wx.Panel):
                 'F1_N_per_kph': str(f1),
                 'F2_N_per_kph2': str(f2),
                 'Test cycle': 'WLTC',
+                'Source file': filepath,
             }
+            self.worker.submit(AnalysisJob(filepath, [f0, f1, f2], mass_kg,
+                                           align=self.align_check.GetValue(), test_info=test_info))
+        self.cancel_btn.Enable(True)
+        self.cancel_all_btn.Enable(True)
+        self._show_queue()
+
+    def on_param_changed(self, event):
+        event.Skip()
+        if self._rescore_timer is not None and self._rescore_timer.IsRunning():
+            self._rescore_timer.Restart(RESCORE_DELAY_MS)
+        else:
+            self._rescore_timer = wx.CallLater(RESCORE_DELAY_MS, self._rescore)
 
-            self.main_frame.update_results(results, test_info, time_s, Vs_kph, Vr_kph)
-
-            self.enable_export_buttons()
-
-            progress.Update(100, "Done!")
-            progress.Destroy()
-
-            wx.MessageBox("Analysis completed successfully!", "Success", wx.OK | wx.ICON_INFORMATION)
-
-        except Exception as e:
-            if 'progress' in locals():
-                progress.Destroy()
-            wx.MessageBox(f"Error during analysis:\n{str(e)}", "Error", wx.OK | wx.ICON_ERROR)
+    def _rescore(self):
+        """마지막으로 읽은 trace 의 speed profile 로 새 파라미터 결과를 worker 에서 계산"""
+        if not self:
+            return
+        results = self.main_frame.results
+        if results is None:
+            return
+        try:
+            mass_kg = float(self.mass_ctrl.GetValue())
+            f0 = float(self.f0_ctrl.GetValue())
+            f1 = float(self.f1_ctrl.GetValue())
+            f2 = float(self.f2_ctrl.GetValue())
+        except ValueError:
+            return                          # 입력 중 (빈 칸, '1.' 등)
+        if mass_kg <= 0:
+            return
+        if not can_rescore(results):
+            # speed profile 이 없는 결과 (예: result cache hit) — 새 값은 다음 분석에만 적용
+            self.main_frame.SetStatusText("Parameters changed - live re-scoring is not available for this "
+                                          "result; the new values apply to the next analysis")
+            return
 
+        test_info = dict(self.main_frame.test_info or {})
+        test_info.update({'Mass': str(mass_kg), 'F0_N': str(f0),
+                          'F1_N_per_kph': str(f1), 'F2_N_per_kph2': str(f2)})
+        # 아직 끝나지 않은 이전 rescore 는 버림
+        if self._rescore_job is not None:
+            self._rescore_job.cancel()
+        self._rescore_job = RescoreJob(results, [f0, f1, f2], mass_kg, test_info=test_info,
+                                       pyramids=self.main_frame.pyramids)
+        self._rescore_job.submitted = time.perf_counter()
+        self.worker.submit(self._rescore_job)
+        self.main_frame.SetStatusText("Re-scoring with new parameters...")
+
+    def _on_rescore_done(self, job, results, loaded):
+        if job is not self._rescore_job or job.base is not self.main_frame.results:
+            return                          # 더 새로운 rescore 나 새 파일 결과가 이미 있음
+        self._rescore_job = None
+        self.main_frame.update_results(results, job.test_info, self.main_frame.time_data,
+                                       self.main_frame.vsched_data, self.main_frame.vroll_data,
+                                       loaded.get("pyramids"))
+        self.main_frame.SetStatusText(
+            f"Re-scored with new parameters in {1e3 * (time.perf_counter() - job.submitted):.1f} ms "
+            f"- DQM: {results['DQM']:.4f}")
+
+    def on_cancel(self, event):
+        self.worker.cancel_current()
+
+    def on_cancel_all(self, event):
+        self.worker.cancel_all()
+
+    def _on_destroy(self, event):
+        if event.GetEventObject() is self:
+            self.worker.shutdown()
+        event.Skip()
+
+    def _show_queue(self, message=None):
+        waiting = self.worker.pending()
+        label = message or self.progress_text.GetLabel()
+        if waiting:
+            label = f"{label}  ({waiting} queued)"
+        self.progress_text.SetLabel(label)
+
+    def _job_finished(self, job):
+        if self.worker.current in (None, job) and not self.worker.pending():
+            self.cancel_btn.Enable(False)
+            self.cancel_all_btn.Enable(False)
+
+    def _on_job_progress(self, job, pct, message):
+        if not self or isinstance(job, RescoreJob):
+            return
+        self.progress_gauge.SetValue(pct)
+        self._show_queue(f"{os.path.basename(job.filepath)}: {message}")
 
+    def _on_job_done(self, job, results, loaded, hit):
+        if not self:
+            return
+        if isinstance(job, RescoreJob):
+            self._on_rescore_done(job, results, loaded)
+            return
+        # 결과가 준비된 뒤에만 요약 / 레이더 / trace 갱신 (main thread, pyramid 는 worker 에서 생성)
+        self.main_frame.update_results(results, job.test_info, loaded.get("time_s"),
+                                       loaded.get("Vs_kph"), loaded.get("Vr_kph"), loaded.get("pyramids"))
+        self.enable_export_buttons()
+
+        message = f"{os.path.basename(job.filepath)}: done"
+        if "lag_s" in results:
+            message += f", Vroll aligned by {results['lag_s']:+.3f} s"
+        if results.get("gaps_interpolated") or results.get("gaps_masked"):
+            message += (f", NaN gaps {int(results['gaps_interpolated'])} interpolated / "
+                        f"{int(results['gaps_masked'])} excluded ({results['masked_s']:.1f} s)")
+        self.progress_gauge.SetValue(100)
+        self._show_queue(message)
+        self.main_frame.SetStatusText(message)
+        self._job_finished(job)
+
+    def _on_job_error(self, job, exc):
+        if not self:
+            return
+        if isinstance(job, RescoreJob):
+            if not isinstance(exc, AnalysisCancelled):
+                self.main_frame.SetStatusText(f"Re-scoring failed: {exc}")
+            return
+        self.progress_gauge.SetValue(0)
+        if isinstance(exc, AnalysisCancelled):
+            self._show_queue(f"{os.path.basename(job.filepath)}: cancelled")
+        else:
+            self._show_queue(f"{os.path.basename(job.filepath)}: failed")
+            wx.MessageBox(f"Error during analysis of {os.path.basename(job.filepath)}:\n{str(exc)}",
+                          "Error", wx.OK | wx.ICON_ERROR)
+        self._job_finished(job)
 
     def on_export_excel(self, event):
         self.main_frame.export_excel()
@@ -518,6 +663,109 @@ class RadarChartPanel(wx.Panel):
         self.Layout()
 
 
+class TracePanel(wx.Panel):
+    """누적 trace 패널 - CEd/CEt, Dd/Dt, 누적 속도 오차 (화면 해상도로 decimate)"""
+
+    # (axis, trace key, label, colour); display scales are in sae_worker.PLOT_TRACES
+    SERIES = [
+        (0, 'CE_target_J', 'Target', '#4169E1'),
+        (0, 'CE_driven_J', 'Driven', '#DC143C'),
+        (1, 'D_target_m', 'Target', '#4169E1'),
+        (1, 'D_driven_m', 'Driven', '#DC143C'),
+        (2, 'SE_cum_m2_s2', 'Σ (Vd - Vt)²', '#2E8B57'),
+    ]
+    YLABELS = ['Cycle energy [MJ]', 'Distance [km]', 'Σ speed error² [m²/s²]']
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.SetBackgroundColour(wx.WHITE)
+
+        main_sizer = wx.BoxSizer(wx.VERTICAL)
+
+        self.title = wx.StaticText(self, label="Cumulative Traces")
+        title_font = wx.Font(14, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD)
+        self.title.SetFont(title_font)
+        main_sizer.Add(self.title, 0, wx.ALL | wx.CENTER, 15)
+
+        self.figure = Figure(figsize=(8, 8), dpi=100)
+        self.canvas = FigureCanvas(self, -1, self.figure)
+        self.toolbar = NavigationToolbar(self.canvas)
+        self.toolbar.Realize()
+        main_sizer.Add(self.canvas, 1, wx.EXPAND | wx.LEFT | wx.RIGHT, 10)
+        main_sizer.Add(self.toolbar, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 10)
+
+        self.empty_label = wx.StaticText(self, label="Traces appear after a full analysis")
+        self.empty_label.SetFont(wx.Font(12, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_ITALIC, wx.FONTWEIGHT_NORMAL))
+        self.empty_label.SetForegroundColour(wx.Colour(128, 128, 128))
+        self.canvas.Hide()
+        self.toolbar.Hide()
+        main_sizer.Add(self.empty_label, 0, wx.ALL | wx.CENTER, 50)
+
+        self.SetSizer(main_sizer)
+
+        self.pyramids = []          # one LODPyramid per SERIES entry
+        self.lines = []
+        self._redraw_pending = False
+
+    def update_traces(self, pyramids):
+        """worker 에서 만든 pyramid (trace key → LODPyramid) 로 전체 구간을 그림 — 여기서는 decimate 된 점만 읽음"""
+        self.figure.clear()
+        self.pyramids, self.lines = [], []
+        if pyramids is None:
+            # per-sample trace 가 없는 결과
+            self.canvas.Hide()
+            self.toolbar.Hide()
+            self.empty_label.Show()
+            self.Layout()
+            return
+
+        self.empty_label.Hide()
+        self.canvas.Show()
+        self.toolbar.Show()
+
+        axes = [self.figure.add_subplot(3, 1, 1)]
+        axes += [self.figure.add_subplot(3, 1, i, sharex=axes[0]) for i in (2, 3)]
+        for ax, ylabel in zip(axes, self.YLABELS):
+            ax.set_ylabel(ylabel, fontsize=9)
+            ax.grid(True, linestyle='--', alpha=0.4)
+            ax.tick_params(labelsize=8)
+        axes[-1].set_xlabel('Cycle time [s]', fontsize=9)
+
+        for axis, key, label, colour in self.SERIES:
+            pyramid = pyramids[key]
+            x, y = pyramid.window(max_points=self._max_points())
+            line, = axes[axis].plot(x, y, color=colour, linewidth=1.2, label=label)
+            self.pyramids.append(pyramid)
+            self.lines.append(line)
+        for ax in axes[:2]:
+            ax.legend(loc='upper left', fontsize=8)
+
+        # zoom / pan 시 보이는 구간만 다시 decimate
+        axes[0].callbacks.connect('xlim_changed', self._on_xlim_changed)
+        self.figure.tight_layout()
+        self.Layout()
+        self.canvas.draw()
+
+    def _max_points(self):
+        # 화면 pixel 당 min / max 2점
+        return max(500, 2 * self.canvas.GetSize().GetWidth())
+
+    def _on_xlim_changed(self, ax):
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            wx.CallAfter(self._redecimate)
+
+    def _redecimate(self):
+        self._redraw_pending = False
+        if not self or not self.lines:
+            return
+        t0, t1 = self.lines[0].axes.get_xlim()
+        for pyramid, line in zip(self.pyramids, self.lines):
+            x, y = pyramid.window(t0, t1, max_points=self._max_points())
+            line.set_data(x, y)
+        self.canvas.draw_idle()
+
+
 class ResultsSummaryPanel(wx.Panel):
     """결과 요약 패널 - 상단 배치, 큰 글자"""
 
@@ -560,6 +808,11 @@ class ResultsSummaryPanel(wx.Panel):
         self.status_text.SetFont(wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_ITALIC, wx.FONTWEIGHT_NORMAL))
         main_sizer.Add(self.status_text, 0, wx.ALL | wx.CENTER, 8)
 
+        # 허용 band (±2 km/h, ±1 s) 이탈 요약
+        self.tolerance_text = wx.StaticText(self, label="")
+        self.tolerance_text.SetFont(wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL))
+        main_sizer.Add(self.tolerance_text, 0, wx.LEFT | wx.RIGHT | wx.BOTTOM | wx.CENTER, 8)
+
         self.SetSizer(main_sizer)
 
     def update_results(self, results):
@@ -597,6 +850,19 @@ class ResultsSummaryPanel(wx.Panel):
 
         self.status_text.SetLabel(f"Status: {status}")
 
+        if 'tol_violations' in results:
+            count = int(results['tol_violations'])
+            label = (f"Tolerance ±{DEFAULT_SPEED_TOL_KPH:g} km/h / ±{DEFAULT_TIME_TOL_S:g} s: "
+                     f"{count} violation{'s' if count != 1 else ''}")
+            if count:
+                label += (f", {results['tol_total_s']:.1f} s total, "
+                          f"longest {results['tol_longest_s']:.1f} s")
+            self.tolerance_text.SetLabel(label)
+            self.tolerance_text.SetForegroundColour(
+                wx.Colour(0, 128, 0) if count == 0 else wx.Colour(192, 0, 0))
+        else:
+            self.tolerance_text.SetLabel("")
+
         self.Layout()
         self.Refresh()
 
@@ -7,8 +7,23 @@
 import numpy as np
 import pandas as pd
 import csv
+import sys
+import os
+import glob
+import json
 import argparse
-from typing import Dict, Optional
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from Frame.ReportFrame.sae_align import align_trace
+from Frame.ReportFrame.sae_cache import ResultCache, file_digest
+from Frame.ReportFrame.sae_condition import j2951_conditioned, summary_values as condition_summary
+from Frame.ReportFrame.sae_io import read_trace, sniff_trace_csv
+from Frame.ReportFrame.sae_kernels import METRIC_KEYS, smooth_speed
+from Frame.ReportFrame.sae_resample import to_j2951_grid
+from Frame.ReportFrame.sae_score import RESULT_FIELDS, dqm, score_file
+from Frame.ReportFrame.sae_segment import score_drive_segments
+from Frame.ReportFrame.sae_store import ResultStore, make_record
 
 def sae_j2951_SI(
     time: np.ndarray,
@@ -20,7 +35,8 @@ def sae_j2951_SI(
     ID: str = "",
     NEC: Optional[float] = None,
     FC: Optional[float] = None,
-    save_path: Optional[str] = None,   # e.g., 'trial.xls' (tab-delimited)
+    save_path: Optional[str] = None,   # SQLite results store, e.g. 'results.sqlite'
+    source_file: Optional[str] = None,
 ) -> Dict[str, float]:
 
     time = np.asarray(time, dtype=float)
@@ -34,6 +50,33 @@ def sae_j2951_SI(
     if n < 5:
         raise ValueError("Need ≥5 samples for the 5-point moving average.")
 
+    if np.isfinite(Vr_kph).all() and np.isfinite(Vs_kph).all():
+        results = _j2951_si_ratings(Vr_kph, Vs_kph, ABCs_SI, Mass_kg)
+    else:
+        # NaN runs: short ones interpolated, long ones split off (sae_condition),
+        # so one bad cell no longer turns every rating into NaN
+        out, gap_report = j2951_conditioned(Vr_kph, Vs_kph, ABCs_SI, Mass_kg)
+        results = {k: float(out[k]) for k in METRIC_KEYS}
+        results.update(condition_summary(gap_report))
+
+    # Optional results-store insert (typed, indexed history; see sae_store)
+    if save_path is not None:
+        record = make_record(
+            dict(results, n_samples=n, DQM=dqm(results)), ABCs_SI, Mass_kg,
+            vehicle=str(Name) or None, test_id=str(ID) or None,
+            source_file=source_file, source_hash=file_digest(source_file) if source_file else None,
+            calculator="SAE_Calculate", NEC=NEC, FC=FC)
+        with ResultStore(save_path) as store:
+            store.insert(record)
+
+    return results
+
+
+def _j2951_si_ratings(Vr_kph: np.ndarray, Vs_kph: np.ndarray, ABCs_SI: np.ndarray,
+                      Mass_kg: float) -> Dict[str, float]:
+    """The six ratings of a finite trace, step by step in SI units"""
+    n = len(Vr_kph)
+
     # --- kph → m/s ---------------------------------------------------------
     Vroll  = Vr_kph / 3.6
     Vsched = Vs_kph / 3.6
@@ -66,26 +109,9 @@ def sae_j2951_SI(
     Me  = 1.015 * ETW
 
     # --- Two-pass 5-point moving average with zeroed endpoints ------------
-    def five_point_ma_with_zero_ends(x: np.ndarray) -> np.ndarray:
-        x = np.asarray(x, dtype=float)
-        y = np.zeros_like(x)
-        if len(x) >= 2:
-            y[1] = 0.0
-        for i in range(2, len(x) - 2):
-            y[i] = (x[i-2] + x[i-1] + x[i] + x[i+1] + x[i+2]) / 5.0
-        if len(x) >= 2:
-            y[-2] = 0.0
-        y[-1] = 0.0
-        return y
-
-    Vd = five_point_ma_with_zero_ends(Vroll)
-    Vt = five_point_ma_with_zero_ends(Vsched)
-    Vd = five_point_ma_with_zero_ends(Vd)
-    Vt = five_point_ma_with_zero_ends(Vt)
-
-    # --- Truncate very low speeds (m/s) -----------------------------------
-    Vd[Vd <= 0.03] = 0.0
-    Vt[Vt <= 0.03] = 0.0
+    # --- then truncate very low speeds (<= 0.03 m/s) ----------------------
+    Vd = smooth_speed(Vroll)
+    Vt = smooth_speed(Vsched)
 
     # --- Accelerations (m/s^2), central diff, dt = 0.1 s ------------------
     ad = np.zeros(n)
@@ -131,7 +157,6 @@ def sae_j2951_SI(
     ASCd = np.sum(np.abs(ad)) * 0.1
     ASCt = np.sum(np.abs(at)) * 0.1
     ASCR = (ASCd - ASCt) / ASCt * 100.0 if ASCt != 0 else np.nan
-    ASCtime = ASCt / (n * 0.1) if n > 0 else np.nan  # not used in results
 
     # --- Inertial work & IWR (inertial-only, positive work portions) -------
     IWd = np.sum(np.maximum(Fid, 0.0) * dd)
@@ -146,22 +171,6 @@ def sae_j2951_SI(
     RMSSE_mps = np.sqrt(np.mean(spd_error))
     RMSSE_mph = 2.237 * RMSSE_mps
 
-    # --- More metrics (SI internal) ----------------------------------------
-    CEdist = CEt[-1] / Dt[-1] if Dt[-1] != 0 else np.nan
-    IWF    = IWt / CEt[-1] if CEt[-1] != 0 else np.nan
-    RLWF   = 1.0 - IWF if np.isfinite(IWF) else np.nan
-
-    # Power & APC
-    Pt = np.zeros(n)
-    if n >= 2:
-        Pt[1:] = Fengt[1:] * Vt[1:]
-    powert_deriv_tmp = np.zeros(n)
-    if n >= 3:
-        powert_deriv_tmp[1:-1] = np.abs((Pt[2:] - Pt[:-2]) / 0.2)
-    powert_deriv_tmp[-1] = Pt[-1]
-    APC = np.sum(powert_deriv_tmp) * 0.1
-    APCtime = APC / (n * 0.1) if n > 0 else np.nan  # not used in results
-
     results = {
         "ER_pct":     ER,
         "DR_pct":     DR,
@@ -169,34 +178,169 @@ def sae_j2951_SI(
         "ASCR_pct":   ASCR,
         "IWR_pct":    IWR,
         "RMSSE_mph":  RMSSE_mph,
-        # You could also expose SI internals if you like:
-        # "RMSSE_mps":  RMSSE_mps,
-        # "CEdist_J_per_m": CEdist,
-        # "IWF": IWF,
-        # "RLWF": RLWF,
-        # "ASCtime": ASCtime,
-        # "APC": APC,
-        # "APCtime": APCtime,
+        # CEdist, IWF, RLWF, ASCtime, APC, APCtime and RMSSE_mps are computed on
+        # demand: SAE_J2951.calculate(...).extended (sae_result.J2951Result)
     }
+    return results
 
-    # Optional “trial.xls” append (tab-delimited)
-    if save_path is not None:
-        row = [
-            str(Name), str(ID),
-            f"{results['ER_pct']}",
-            f"{results['DR_pct']}",
-            f"{results['EER_pct']}",
-            f"{results['ASCR_pct']}",
-            f"{results['IWR_pct']}",
-            f"{results['RMSSE_mph']}",
-            "" if NEC is None else f"{NEC}",
-            "" if FC  is None else f"{FC}",
-            "",
-        ]
-        with open(save_path, "a", newline="") as f:
-            csv.writer(f, delimiter="\t").writer.writerow(row)
 
-    return results
+def read_trace_csv(path: str):
+    """CSV → (time_s, Vs_kph, Vr_kph); delimiter & header variants auto-detected"""
+    # Accept either ['Vsched','Vroll'] or ['Vnom','Vact'] as speed columns
+    return read_trace(path)
+
+
+# --- Batch (directory / glob) mode ----------------------------------------
+def _score_chunk(paths: List[str], ABCs_SI: np.ndarray, Mass_kg: float,
+                 cache_dir: Optional[str] = None, align: bool = False,
+                 with_hash: bool = False) -> List[Dict[str, object]]:
+    rows = [score_file(p, ABCs_SI, Mass_kg, cache_dir, align) for p in paths]
+    if with_hash:
+        # source hash for the results store, computed in the worker
+        for row in rows:
+            if not row["error"]:
+                row["source_hash"] = file_digest(row["file"])
+    return rows
+
+
+def _store_records(rows: List[Dict[str, object]], ABCs_SI: np.ndarray, Mass_kg: float,
+                   vehicle: Optional[str], calculator: str) -> List[Dict[str, object]]:
+    """Successful batch rows → results-store records (test date from score_file)"""
+    records = []
+    for row in rows:
+        if row["error"]:
+            continue
+        path = str(row["file"])
+        records.append(make_record(
+            row, ABCs_SI, Mass_kg, vehicle=vehicle,
+            test_id=os.path.splitext(os.path.basename(path))[0],
+            test_date=row["test_date"],
+            source_file=path, source_hash=row.get("source_hash"), calculator=calculator))
+    return records
+
+
+def is_trace_file(path: str) -> bool:
+    """True when the file's header maps time / Vsched / Vroll (not a result table, not a directory)"""
+    if not os.path.isfile(path):
+        return False
+    try:
+        sniff_trace_csv(path, sniff_bytes=4096)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def iter_input_files(pattern: str) -> Iterator[str]:
+    """
+    Directory (every *.csv below it) or glob pattern → trace file paths,
+    lazily. Files without a time / Vsched / Vroll header, such as the
+    results of an earlier batch, are skipped with a note on stderr.
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "**", "*.csv")
+    for path in glob.iglob(pattern, recursive=True):
+        if is_trace_file(path):
+            yield path
+        elif os.path.isfile(path):
+            print(f"- {path}: not a drive trace, skipped", file=sys.stderr)
+
+
+def _chunks(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ResultWriter:
+    """Streams result rows to CSV or JSONL (chosen by file extension; '-' is JSONL on stdout)"""
+
+    def __init__(self, path: str):
+        self.jsonl = path == "-" or path.lower().endswith((".jsonl", ".ndjson"))
+        self.f = sys.stdout if path == "-" else open(path, "w", newline="")
+        if not self.jsonl:
+            self.writer = csv.DictWriter(self.f, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+            self.writer.writeheader()
+
+    def write(self, row: Dict[str, object]):
+        if self.jsonl:
+            clean = {k: (None if isinstance(v, float) and np.isnan(v) else v) for k, v in row.items()}
+            self.f.write(json.dumps(clean) + "\n")
+        else:
+            self.writer.writerow(row)
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        if self.f is not sys.stdout:
+            self.f.close()
+
+
+def run_batch(paths: Iterable[str], ABCs_SI: np.ndarray, Mass_kg: float,
+              out_path: str, workers: Optional[int] = None, chunksize: int = 8,
+              cache_dir: Optional[str] = None, align: bool = False,
+              store_path: Optional[str] = None, vehicle: Optional[str] = None) -> Dict[str, int]:
+    """
+    Score many CSV files over a process pool, writing each row as its chunk
+    finishes. At most 2 chunks per worker are in flight, so the file list is
+    never materialized. Every row carries vehicle and its test_date, so the
+    output can be aggregated per vehicle and day. With store_path, the successful rows of each
+    finished batch of chunks are also bulk-inserted into the results store.
+    out_path itself is never scored, even when it matches the input glob.
+
+    Returns:
+    - dict: {'files': n, 'failed': n}
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = 2 * workers
+    counts = {"files": 0, "failed": 0}
+
+    if out_path != "-":
+        out_abs = os.path.abspath(out_path)
+        paths = (p for p in paths if os.path.abspath(p) != out_abs)
+
+    writer = ResultWriter(out_path)
+    store = ResultStore(store_path) if store_path else None
+    calculator = "SAE_Calculate+align" if align else "SAE_Calculate"
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+
+            def write_done(done):
+                finished = []
+                for fut in done:
+                    for row in fut.result():
+                        row["vehicle"] = vehicle
+                        writer.write(row)
+                        finished.append(row)
+                        counts["files"] += 1
+                        if row["error"]:
+                            counts["failed"] += 1
+                            print(f"✗ {row['file']}: {row['error']}", file=sys.stderr)
+                writer.flush()
+                if store is not None:
+                    store.insert_many(_store_records(finished, ABCs_SI, Mass_kg, vehicle, calculator))
+
+            for chunk in _chunks(paths, chunksize):
+                pending.add(pool.submit(_score_chunk, chunk, ABCs_SI, Mass_kg, cache_dir, align,
+                                        store is not None))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    write_done(done)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write_done(done)
+    finally:
+        writer.close()
+        if store is not None:
+            store.close()
+
+    return counts
 
 
 def main():
@@ -208,7 +352,27 @@ def main():
     parser.add_argument("--name", default="ACTYON2?")
     parser.add_argument("--id", default="run-1")
     parser.add_argument("--save", default="",
-                        help="Optional tab-delimited output (e.g., trial.xls).")
+                        help="Optional SQLite results store to record the run in (e.g., results.sqlite).")
+
+    # Batch mode: a directory or glob instead of --file
+    parser.add_argument("--dir", default="",
+                        help="Score every *.csv below this directory (batch mode).")
+    parser.add_argument("--glob", default="",
+                        help="Score every file matching this glob, e.g. 'runs/**/*.csv' (batch mode).")
+    parser.add_argument("--out", default="j2951_results.csv",
+                        help="Batch output, .csv or .jsonl; '-' for JSON lines on stdout (default: j2951_results.csv)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=8,
+                        help="Files per submitted task (default: 8)")
+    parser.add_argument("--align", action="store_true",
+                        help="Estimate the Vroll lag (FFT cross-correlation) and shift it out before scoring.")
+    parser.add_argument("--cache-dir", default="",
+                        help="Reuse results of unchanged files scored with the same parameters.")
+    parser.add_argument("--db", default="",
+                        help="Also bulk-insert batch results into this SQLite results store.")
+    parser.add_argument("--segment", choices=["cycle", "microtrip"], default=None,
+                        help="Split the log at stops and print one result row per cycle / micro-trip.")
 
     # ABCs in SI: F0 [N], F1 [N/kph], F2 [N/kph^2]
     # Defaults taken from your comments: 21.098, 0.2823, 0.045611
@@ -221,55 +385,78 @@ def main():
 
     args = parser.parse_args()
 
-    # 1) Read CSV; auto-detect delimiter & tolerate header variants
-    df = pd.read_csv(args.file, sep=None, engine="python")
-
-    # Accept either ['Vsched','Vroll'] or ['Vnom','Vact'] as speed columns
-    cols = {c.lower(): c for c in df.columns}
-    # Required time column
-    time_col = cols.get("time") or cols.get("t") or "time"
-    # Scheduled speed
-    vs_col = cols.get("vsched") or cols.get("vnom") or "Vsched"
-    # Driven/actual speed
-    vr_col = cols.get("vroll") or cols.get("vact") or "Vroll"
-
-    time_s = pd.to_numeric(df[time_col], errors="coerce").to_numpy()
-    Vs_kph = pd.to_numeric(df[vs_col],  errors="coerce").to_numpy()
-    Vr_kph = pd.to_numeric(df[vr_col],  errors="coerce").to_numpy()
-
-    # 2) Coeffs & mass (SI)
+    # 1) Coeffs & mass (SI)
     ABCs_SI = np.array([args.F0_N,
                         args.F1_N_per_kph,
                         args.F2_N_per_kph2], dtype=float)
     Mass_kg = float(args.mass_kg)
 
-    # 3) Run
+    if args.dir or args.glob:
+        paths = iter_input_files(args.dir or args.glob)
+        counts = run_batch(paths, ABCs_SI, Mass_kg, args.out,
+                           workers=args.workers, chunksize=max(1, args.chunksize),
+                           cache_dir=args.cache_dir or None, align=args.align,
+                           store_path=args.db or None, vehicle=args.name)
+        print(f"✓ {counts['files']} files scored, {counts['failed']} failed → {args.out}",
+              file=sys.stderr)
+        return
+
+    if args.segment:
+        time_s, Vs_kph, Vr_kph = read_trace_csv(args.file)
+        time_s, Vs_kph, Vr_kph, _ = to_j2951_grid(time_s, Vs_kph, Vr_kph)
+        if args.align:
+            Vr_kph, _ = align_trace(Vr_kph, Vs_kph)
+        table = score_drive_segments(time_s, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, level=args.segment)
+        print(table.to_string(index=False))
+        return
+
     save_path = args.save if args.save.strip() else None
-    out = sae_j2951_SI(time_s, Vr_kph, Vs_kph,
-                       ABCs_SI, Mass_kg,
-                       Name=args.name, ID=args.id,
-                       save_path=save_path)
+
+    def run():
+        # 2) Read CSV; auto-detect delimiter & tolerate header variants
+        time_s, Vs_kph, Vr_kph = read_trace_csv(args.file)
+        # Irregular / non-10 Hz logs → 10 Hz grid
+        time_s, Vs_kph, Vr_kph, report = to_j2951_grid(time_s, Vs_kph, Vr_kph)
+        if report is not None:
+            print(f"resampled {report['n_in']} → {report['n_out']} samples "
+                  f"({report['input_rate_hz']:.1f} Hz, {report['gaps']} gaps, "
+                  f"{report['duplicates']} duplicates, {report['nonfinite']} non-finite values)",
+                  file=sys.stderr)
+        if args.align:
+            Vr_kph, lag = align_trace(Vr_kph, Vs_kph)
+            print(f"aligned Vroll by {lag['lag_s']:+.3f} s (r = {lag['correlation']:.4f})",
+                  file=sys.stderr)
+
+        # 3) Run
+        return sae_j2951_SI(time_s, Vr_kph, Vs_kph,
+                            ABCs_SI, Mass_kg,
+                            Name=args.name, ID=args.id,
+                            save_path=save_path, source_file=args.file)
+
+    # The results-store insert happens inside the run, so --save always recomputes
+    if args.cache_dir and save_path is None:
+        out, hit = ResultCache(args.cache_dir).get_or_compute(
+            args.file, ABCs_SI, Mass_kg, run,
+            calculator="SAE_Calculate+align" if args.align else "SAE_Calculate")
+        if hit:
+            print("cached result (file and parameters unchanged)", file=sys.stderr)
+    else:
+        out = run()
 
     # 4) Print results (values only, like your original)
-    rounded = {k: (round(v, 6) if pd.notna(v) else None) for k, v in out.items()}
+    rounded = {k: (round(out[k], 6) if pd.notna(out[k]) else None) for k in METRIC_KEYS}
     for k, v in rounded.items():
         print(f"{v}")
+    if "gaps_masked" in out:
+        print(f"{out['gaps_interpolated']} gaps interpolated, {out['gaps_masked']} masked "
+              f"({out['masked_s']:.1f} s)", file=sys.stderr)
 
     # 5) DQM calculation
-    keys = ["ER_pct", "DR_pct", "EER_pct", "ASCR_pct", "IWR_pct", "RMSSE_mph"]
-    values = [abs(out[k]) for k in keys if k in out and pd.notna(out[k])]
-    if len(values) == 6:
-        DQM = sum(values) / 6
-    else:
-        DQM = np.nan
+    DQM = dqm(out)
     print(f"{DQM:.6f}")
 
-    # Optional save of DQM as well
     if save_path is not None:
-        header = ["ER_pct", "DR_pct", "EER_pct", "ASCR_pct", "RMSSE_mph", "IWR_pct", "DQM"]
-        row = [args.name, args.id] + [out.get(k, "") for k in keys] + [DQM]
-        with open(save_path, "a", newline="") as f:
-            csv.writer(f, delimiter="\t").writer.writerow(row)
+        print(f"recorded in {save_path}", file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -2,13 +2,35 @@ import numpy as np
 import pandas as pd
 import os
 
+from Frame.ReportFrame.sae_kernels import five_point_ma_with_zero_ends
+from Frame.ReportFrame.sae_align import DEFAULT_MAX_LAG_S, align_trace
+from Frame.ReportFrame.sae_blocked import DEFAULT_BLOCK, j2951_blocked, j2951_parallel
+from Frame.ReportFrame.sae_condition import DEFAULT_MAX_INTERP_S, condition_trace, score_segments, \
+    summary_values
+from Frame.ReportFrame.sae_io import read_trace, sniff_trace_csv
+from Frame.ReportFrame.sae_phases import WLTC_CLASS3_PHASES, j2951_phases
+from Frame.ReportFrame.sae_reference import j2951_reference, j2951_reference_batch
+from Frame.ReportFrame.sae_result import J2951Result
+from Frame.ReportFrame.sae_segment import score_drive_segments
+
 class SAE_J2951:
     @staticmethod
-    def calculate(time, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, self=None):
+    def calculate(time, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, self=None, align=False,
+                  max_lag_s=DEFAULT_MAX_LAG_S, max_interp_s=DEFAULT_MAX_INTERP_S,
+                  long_gaps="split"):
+        """
+        align=True 이면 FFT cross-correlation 으로 Vroll 의 지연을 추정·보정한 뒤 계산하고,
+        추정 지연 [s] 을 results['lag_s'] 로 함께 반환
+
+        NaN 이 있으면 max_interp_s 이하 구간은 보간, 더 긴 구간은 long_gaps
+        ('split' | 'drop') 로 처리하고 gaps_interpolated / gaps_masked / masked_s 를 추가
+
+        Returns:
+        - J2951Result (dict): 6 ratings + DQM; 확장 지표는 첫 접근 시 계산
+        """
         time = np.asarray(time, dtype=float)
         Vr_kph = np.asarray(Vr_kph, dtype=float)
         Vs_kph = np.asarray(Vs_kph, dtype=float)
-        ABCs_SI = np.asarray(ABCs_SI, dtype=float)
 
         n = len(time)
         if not (len(Vr_kph) == len(Vs_kph) == n):
@@ -16,116 +38,127 @@ class SAE_J2951:
         if n < 5:
             raise ValueError("Need ≥5 samples for the 5-point moving average.")
 
-        # kph → m/s
-        Vroll = Vr_kph / 3.6
-        Vsched = Vs_kph / 3.6
-
-        # Dyno coefficients
-        F0_N = ABCs_SI[0]
-        F1_N_per_kph = ABCs_SI[1]
-        F2_N_per_kph2 = ABCs_SI[2]
-
-        F1 = F1_N_per_kph * 3.6
-        F2 = F2_N_per_kph2 * (3.6 * 3.6)
-        F0 = F0_N
-
-        ETW = Mass_kg
-        Me = 1.015 * ETW
-
-        Vd = SAE_J2951.five_point_ma_with_zero_ends(Vroll)
-        Vt = SAE_J2951.five_point_ma_with_zero_ends(Vsched)
-        Vd = SAE_J2951.five_point_ma_with_zero_ends(Vd)
-        Vt = SAE_J2951.five_point_ma_with_zero_ends(Vt)
-
-        Vd[Vd <= 0.03] = 0.0
-        Vt[Vt <= 0.03] = 0.0
-
-        # Accelerations
-        ad = np.zeros(n)
-        at = np.zeros(n)
-        if n >= 3:
-            ad[1:-1] = (Vd[2:] - Vd[:-2]) / 0.2
-            at[1:-1] = (Vt[2:] - Vt[:-2]) / 0.2
-
-        # Distances
-        dd = np.zeros(n)
-        dtm = np.zeros(n)
-        if n >= 2:
-            dd[1:] = Vd[1:] * 0.1
-            dtm[1:] = Vt[1:] * 0.1
-        Dd = np.cumsum(dd)
-        Dt = np.cumsum(dtm)
-
-        # Forces
-        Frld = F0 + F1 * Vd + F2 * (Vd ** 2)
-        Frlt = F0 + F1 * Vt + F2 * (Vt ** 2)
-        Fid = Me * ad
-        Fit = Me * at
-
-        # Engine force
-        Fengd = np.where(Frld + Fid >= 0.0, Frld + Fid, 0.0)
-        Fengt = np.where(Frlt + Fit >= 0.0, Frlt + Fit, 0.0)
-
-        # Work
-        Wengd = Fengd * dd
-        Wengt = Fengt * dtm
-
-        # Cycle energy
-        CEd = np.cumsum(Wengd)
-        CEt = np.cumsum(Wengt)
-
-        # Ratings
-        ER = (CEd[-1] - CEt[-1]) / CEt[-1] * 100.0 if CEt[-1] != 0 else np.nan
-        DR = (Dd[-1] - Dt[-1]) / Dt[-1] * 100.0 if Dt[-1] != 0 else np.nan
-        EER = (1.0 - (((DR/100.0) + 1.0) / ((ER/100.0) + 1.0))) * 100.0 \
-              if ((ER/100.0) + 1.0) != 0 else np.nan
-
-        # ASC & ASCR
-        ASCd = np.sum(np.abs(ad)) * 0.1
-        ASCt = np.sum(np.abs(at)) * 0.1
-        ASCR = (ASCd - ASCt) / ASCt * 100.0 if ASCt != 0 else np.nan
-
-        # Inertial work
-        IWd = np.sum(np.maximum(Fid, 0.0) * dd)
-        IWt = np.sum(np.maximum(Fit, 0.0) * dtm)
-        IWR = (IWd - IWt) / IWt * 100.0 if IWt != 0 else np.nan
-
-        # RMS speed error
-        spd_error = (Vd - Vt) ** 2
-        RMSSE_mps = np.sqrt(np.mean(spd_error))
-        RMSSE_mph = 2.237 * RMSSE_mps
-
-        results = {
-            "ER_pct": ER,
-            "DR_pct": DR,
-            "EER_pct": EER,
-            "ASCR_pct": ASCR,
-            "IWR_pct": IWR,
-            "RMSSE_mph": RMSSE_mph,
-        }
-
-        # DQM
-        keys = ["ER_pct", "DR_pct", "EER_pct", "ASCR_pct", "IWR_pct", "RMSSE_mph"]
-        values = [abs(results[k]) for k in keys if k in results and pd.notna(results[k])]
-        if len(values) == 6:
-            results['DQM'] = sum(values) / 6
-        else:
-            results['DQM'] = np.nan
+        lag = None
+        if align:
+            Vr_kph, lag = align_trace(Vr_kph, Vs_kph, max_lag_s=max_lag_s)
 
+        report = segments = kept = None
+        if np.isfinite(Vr_kph).all() and np.isfinite(Vs_kph).all():
+            # 같은 목표 cycle 은 target 쪽 계산을 재사용 (reference-cycle cache)
+            columns = j2951_reference(Vr_kph, Vs_kph, ABCs_SI, Mass_kg)
+        else:
+            Vr_kph, Vs_kph, segments, report = condition_trace(
+                Vr_kph, Vs_kph, max_interp_s=max_interp_s, long_gaps=long_gaps)
+            columns = score_segments(Vr_kph, Vs_kph, segments, ABCs_SI, Mass_kg)
+            kept = report["kept"]
+
+        # 확장 지표 / per-sample trace 는 results.extended, results.traces 에서 필요할 때 계산
+        # traces 는 'drop' 으로 빠진 샘플 자리에 NaN 을 넣어 입력 시간축에 맞춤
+        results = J2951Result({k: v[()] for k, v in columns.items()},
+                              Vr_kph, Vs_kph, ABCs_SI, Mass_kg, segments, kept=kept, n_input=n)
+        if lag is not None:
+            results["lag_s"] = lag["lag_s"]
+        if report is not None:
+            results.update(summary_values(report))
         return results
 
+    @staticmethod
+    def calculate_blocked(time, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, block_size=DEFAULT_BLOCK):
+        """
+        대용량 로그용: block 단위 fused kernel (메모리 사용량이 block_size 로 제한)
+        """
+        return j2951_blocked(time, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, block_size=block_size)
+
+    @staticmethod
+    def calculate_parallel(time, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, workers=None, block_size=DEFAULT_BLOCK):
+        """
+        긴 로그 하나를 여러 core 에서: block 을 thread 로 나눠 계산하고 block 순서대로 합산
+        (worker 수와 무관하게 calculate_blocked 와 bit-identical)
+        """
+        return j2951_parallel(time, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, workers=workers, block_size=block_size)
+
+    @staticmethod
+    def calculate_segments(time, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, level="cycle", **options):
+        """
+        여러 cycle / warm-up 이 이어진 긴 로그: 정지 구간으로 나눠 segment 별로 따로 계산
+
+        Parameters:
+        - level: 'cycle' (긴 정지로 구분) | 'microtrip' (짧은 정지로 구분)
+        - options: segment_trace 의 threshold_kph, min_stop_s, min_drive_s, on
+
+        Returns:
+        - DataFrame: segment 당 한 행 (start_s, end_s, duration_s, 6 ratings, DQM)
+        """
+        return score_drive_segments(time, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, level=level, **options)
+
+    @staticmethod
+    def calculate_phases(time, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, phases=WLTC_CLASS3_PHASES,
+                         boundary="continuous"):
+        """
+        cycle phase (기본 WLTC class 3 Low / Medium / High / Extra High) 별 지표와 전체 cycle
+
+        Parameters:
+        - phases: (name, t_start, t_end) [s] 목록
+        - boundary: 'continuous' (전체 신호로 smoothing, phase 합 = cycle 합) |
+          'restart' (phase 마다 독립 trace 로 계산, slice 에 calculate 한 것과 같음)
+
+        Returns:
+        - DataFrame: phase 당 한 행 + 'Total' 행 (start_s, end_s, n_samples, 6 ratings, DQM)
+        """
+        return j2951_phases(time, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, phases=phases, boundary=boundary)
+
+    @staticmethod
+    def calculate_batch(time, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, lengths=None):
+        """
+        여러 run 을 한 번에 계산 (vectorized)
+
+        Parameters:
+        - time, Vr_kph, Vs_kph: list of 1-D arrays (variable length), or
+          zero-padded 2-D arrays (runs x samples) together with `lengths`.
+          time may be None.
+        - ABCs_SI: [F0, F1, F2] shared by all runs, or one row per run
+        - Mass_kg: scalar or one value per run
+        - lengths: valid samples per row for padded 2-D input
+
+        Returns:
+        - DataFrame: one row per run (ER_pct ... RMSSE_mph, DQM, n_samples)
+        """
+        if isinstance(Vr_kph, np.ndarray) and Vr_kph.ndim == 2:
+            Vr = np.asarray(Vr_kph, dtype=float)
+            Vs = np.asarray(Vs_kph, dtype=float)
+            if Vr.shape != Vs.shape:
+                raise ValueError("Vr_kph, Vs_kph must have the same shape.")
+            lengths = np.full(Vr.shape[0], Vr.shape[1]) if lengths is None \
+                else np.asarray(lengths, dtype=int)
+            if np.any(lengths > Vr.shape[1]):
+                raise ValueError("lengths exceed the padded array width.")
+        else:
+            if len(Vr_kph) != len(Vs_kph):
+                raise ValueError("Vr_kph, Vs_kph must hold the same number of runs.")
+            lengths = np.array([len(v) for v in Vr_kph], dtype=int)
+            for i, (vr, vs) in enumerate(zip(Vr_kph, Vs_kph)):
+                if len(vs) != len(vr) or (time is not None and len(time[i]) != len(vr)):
+                    raise ValueError(f"run {i}: time, Vr_kph, Vs_kph must have the same length.")
+
+            width = int(lengths.max()) if len(lengths) else 0
+            Vr = np.zeros((len(lengths), width))
+            Vs = np.zeros((len(lengths), width))
+            for i, (vr, vs) in enumerate(zip(Vr_kph, Vs_kph)):
+                Vr[i, :lengths[i]] = vr
+                Vs[i, :lengths[i]] = vs
+
+        if np.any(lengths < 5):
+            raise ValueError("Need ≥5 samples for the 5-point moving average.")
+
+        # 같은 목표 cycle 의 run 들은 target 쪽을 한 번만 계산
+        columns = j2951_reference_batch(Vr, Vs, ABCs_SI, Mass_kg, lengths)
+        table = pd.DataFrame(columns)
+        table["n_samples"] = lengths
+        return table
+
     @staticmethod
     def five_point_ma_with_zero_ends(x):
-        x = np.asarray(x, dtype=float)
-        y = np.zeros_like(x)
-        if len(x) >= 2:
-            y[1] = 0.0
-        for i in range(2, len(x) - 2):
-            y[i] = (x[i - 2] + x[i - 1] + x[i] + x[i + 1] + x[i + 2]) / 5.0
-        if len(x) >= 2:
-            y[-2] = 0.0
-        y[-1] = 0.0
-        return y
+        return five_point_ma_with_zero_ends(x)
 
 
 def main():
@@ -137,32 +170,25 @@ def main():
     # CSV 파일 읽기
     try:
         print(os.getcwd())
-        df = pd.read_csv("./ReportFrame/data.csv", sep=None, engine="python")
-        print(f"✓ CSV file loaded: {len(df)} rows")
+        fmt = sniff_trace_csv("./ReportFrame/data.csv")
     except FileNotFoundError:
         print("✗ Error: data.csv not found")
         return
-    except Exception as e:
-        print(f"✗ Error reading CSV: {e}")
+    except ValueError as e:
+        print(f"✗ Error: Column not found - {e}")
         return
 
     # 컬럼 매핑
-    cols = {c.lower(): c for c in df.columns}
-    time_col = cols.get("time") or cols.get("t") or "time"
-    vs_col = cols.get("vsched") or cols.get("vnom") or "Vsched"
-    vr_col = cols.get("vroll") or cols.get("vact") or "Vroll"
-
-    print(f"✓ Columns mapped: {time_col}, {vs_col}, {vr_col}")
+    cols = fmt["columns"]
+    print(f"✓ Columns mapped: {cols['time']}, {cols['vsched']}, {cols['vroll']}")
 
     # 데이터 추출
     try:
-        time_s = pd.to_numeric(df[time_col], errors="coerce").to_numpy()
-        Vs_kph = pd.to_numeric(df[vs_col], errors="coerce").to_numpy()
-        Vr_kph = pd.to_numeric(df[vr_col], errors="coerce").to_numpy()
+        time_s, Vs_kph, Vr_kph = read_trace("./ReportFrame/data.csv", fmt)
+        print(f"✓ CSV file loaded: {len(time_s)} rows")
         print(f"✓ Data extracted: {len(time_s)} points")
-    except KeyError as e:
-        print(f"✗ Error: Column not found - {e}")
-        print(f"Available columns: {list(df.columns)}")
+    except Exception as e:
+        print(f"✗ Error reading CSV: {e}")
         return
 
     # 파라미터 설정
@@ -0,0 +1,268 @@
+"""
+Cross-run aggregation and ranking of SAE J2951 results
+차량 (또는 임의 group) 별 DQM / ER 분포, percentile, outlier, 일별 trend — 새 run 이 들어오면 전체 재계산 없이 누적 갱신
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_GROUP_BY = ("vehicle",)
+DEFAULT_METRICS = ("DQM", "ER_pct")
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+OUTLIER_IQR = 1.5               # Tukey fences: outside [Q1 - k·IQR, Q3 + k·IQR]
+
+
+class FleetAggregator:
+    """
+    Grouped statistics of many runs, updated batch by batch.
+
+    Per group and metric it keeps
+    - count, mean and M2 (Chan's parallel merge, so mean / std of the
+      union equal a one-pass computation over all runs)
+    - min and max
+    - the sorted values (exact percentiles; a new batch is merged into
+      the sorted array, not re-sorted from scratch)
+    and per (group, test_date) the run count and metric sums for trends.
+
+    Input batches are DataFrames as produced by ResultStore.query(), the
+    batch CLI (.csv / .jsonl) or SAE_J2951.calculate_batch(); the group
+    columns may be any columns present (vehicle, driver, test_id, ...).
+    """
+
+    def __init__(self, by=DEFAULT_GROUP_BY, metrics=DEFAULT_METRICS, percentiles=DEFAULT_PERCENTILES):
+        self.by = list(by)
+        self.metrics = list(metrics)
+        self.percentiles = list(percentiles)
+        self.moments = {}           # stat → DataFrame (groups x metrics)
+        self.values = {}            # group key tuple → {metric: sorted array}
+        self.daily = None           # (group…, test_date) x (metric, count / sum)
+        self.n_runs = 0
+        self.last_id = None         # highest ResultStore row id seen
+
+    # --- updates ----------------------------------------------------------
+    def update(self, runs):
+        """Fold a batch of runs into the statistics; returns self"""
+        runs = self._prepare(runs)
+        if runs.empty:
+            return self
+        grouped = runs.groupby(self.by, dropna=False, sort=False)[self.metrics]
+
+        batch = {
+            "n": grouped.count().astype(float),
+            "mean": grouped.mean(),
+            "M2": grouped.var(ddof=0) * grouped.count(),
+            "min": grouped.min(),
+            "max": grouped.max(),
+        }
+        self.moments = batch if not self.moments else self._merge_moments(self.moments, batch)
+
+        for key, sub in grouped:
+            key = key if isinstance(key, tuple) else (key,)
+            store = self.values.setdefault(key, {})
+            for m in self.metrics:
+                new = sub[m].dropna().to_numpy(dtype=float)
+                if not len(new):
+                    continue
+                old = store.get(m)
+                if old is None:
+                    store[m] = np.sort(new)
+                else:
+                    merged = np.concatenate([old, np.sort(new)])
+                    merged.sort(kind="stable")      # two sorted runs: timsort merges in O(n)
+                    store[m] = merged
+
+        if "test_date" in runs:
+            day = runs.groupby(self.by + ["test_date"], dropna=False)[self.metrics].agg(["count", "sum"])
+            self.daily = day if self.daily is None else self.daily.add(day, fill_value=0)
+
+        self.n_runs += len(runs)
+        if "id" in runs and runs["id"].notna().any():
+            top = int(runs["id"].max())
+            self.last_id = top if self.last_id is None else max(self.last_id, top)
+        return self
+
+    def update_from_store(self, store, **filters):
+        """Fold in only the ResultStore rows inserted since the last call"""
+        return self.update(store.query(after_id=self.last_id, **filters))
+
+    @staticmethod
+    def _merge_moments(a, b):
+        index = a["n"].index.union(b["n"].index)
+        fills = {"n": 0.0, "mean": 0.0, "M2": 0.0, "min": np.inf, "max": -np.inf}
+        a = {k: v.reindex(index).fillna(fills[k]) for k, v in a.items()}
+        b = {k: v.reindex(index).fillna(fills[k]) for k, v in b.items()}
+
+        n = a["n"] + b["n"]
+        safe = n.where(n > 0, 1.0)
+        delta = b["mean"] - a["mean"]
+        mean = a["mean"] + delta * b["n"] / safe
+        M2 = a["M2"] + b["M2"] + delta ** 2 * a["n"] * b["n"] / safe
+        return {
+            "n": n,
+            "mean": mean.where(n > 0),
+            "M2": M2,
+            "min": np.minimum(a["min"], b["min"]).replace(np.inf, np.nan),
+            "max": np.maximum(a["max"], b["max"]).replace(-np.inf, np.nan),
+        }
+
+    def _prepare(self, runs):
+        runs = pd.DataFrame(runs)
+        if "error" in runs:
+            runs = runs[runs["error"].fillna("") == ""]
+        for col in self.by:
+            if col not in runs:
+                runs[col] = None
+        for m in self.metrics:
+            runs[m] = pd.to_numeric(runs[m], errors="coerce") if m in runs else np.nan
+        return runs
+
+    # --- views ------------------------------------------------------------
+    def _percentile_frame(self, metric):
+        rows = {key: (np.percentile(vals[metric], self.percentiles) if len(vals.get(metric, ())) else
+                      np.full(len(self.percentiles), np.nan))
+                for key, vals in self.values.items()}
+        frame = pd.DataFrame.from_dict(rows, orient="index",
+                                       columns=[f"p{p:g}" for p in self.percentiles])
+        frame.index = pd.MultiIndex.from_tuples(frame.index, names=self.by) if len(self.by) > 1 \
+            else pd.Index([k[0] for k in frame.index], name=self.by[0])
+        return frame
+
+    def summary(self):
+        """
+        Returns:
+        - DataFrame: one row per group; columns (metric, stat) with stat in
+          runs, mean, std, min, p5 … p95, max
+        """
+        if not self.moments:
+            return pd.DataFrame()
+        parts = {}
+        for m in self.metrics:
+            n = self.moments["n"][m]
+            frame = pd.DataFrame({
+                "runs": n.astype(int),
+                "mean": self.moments["mean"][m],
+                "std": np.sqrt(self.moments["M2"][m] / n.where(n > 0)),
+                "min": self.moments["min"][m],
+            })
+            frame = frame.join(self._percentile_frame(m))
+            frame["max"] = self.moments["max"][m]
+            parts[m] = frame
+        return pd.concat(parts, axis=1).sort_index()
+
+    def ranking(self, metric="DQM", stat="p50"):
+        """
+        Groups ranked best first by |stat| of a metric (0 is ideal for every
+        J2951 rating).
+
+        Returns:
+        - DataFrame: rank, <metric> stat, runs
+        """
+        table = self.summary()
+        if table.empty:
+            return table
+        col = table[(metric, stat)]
+        out = pd.DataFrame({f"{metric}_{stat}": col, "runs": table[(metric, "runs")]})
+        out = out.iloc[np.argsort(np.abs(col.to_numpy()), kind="stable")]
+        out.insert(0, "rank", np.arange(1, len(out) + 1))
+        return out
+
+    def trend(self, metric="DQM"):
+        """
+        Day-by-day mean per group with the change from the group's previous
+        test day.
+
+        Returns:
+        - DataFrame: group columns, test_date, runs, mean, delta
+        """
+        if self.daily is None:
+            return pd.DataFrame()
+        day = self.daily[metric]
+        out = pd.DataFrame({"runs": day["count"].astype(int),
+                            "mean": day["sum"] / day["count"].where(day["count"] > 0)})
+        out = out.sort_index().reset_index()
+        out["delta"] = out.groupby(self.by, dropna=False)["mean"].diff()
+        return out
+
+    def outliers(self, runs, k=OUTLIER_IQR):
+        """
+        Flag runs outside their group's Tukey fences for each metric
+        (current statistics, so new runs are judged against the fleet so far).
+
+        Returns:
+        - runs with an added boolean <metric>_outlier column per metric and
+          an 'outlier' column (any metric)
+        """
+        runs = self._prepare(runs).copy()
+        any_flag = np.zeros(len(runs), dtype=bool)
+        for m in self.metrics:
+            fences = self._quartiles(m)
+            iqr = fences["p75"] - fences["p25"]
+            fences["lo"] = fences["p25"] - k * iqr
+            fences["hi"] = fences["p75"] + k * iqr
+            joined = runs[self.by].merge(fences[["lo", "hi"]], how="left",
+                                         left_on=self.by, right_index=True)
+            x = runs[m].to_numpy()
+            flag = (x < joined["lo"].to_numpy()) | (x > joined["hi"].to_numpy())
+            runs[f"{m}_outlier"] = flag
+            any_flag |= flag
+        runs["outlier"] = any_flag
+        return runs
+
+    def _quartiles(self, metric):
+        rows = {key: np.percentile(vals[metric], [25, 75]) if len(vals.get(metric, ())) else [np.nan, np.nan]
+                for key, vals in self.values.items()}
+        frame = pd.DataFrame.from_dict(rows, orient="index", columns=["p25", "p75"])
+        frame.index = pd.MultiIndex.from_tuples(frame.index, names=self.by) if len(self.by) > 1 \
+            else pd.Index([k[0] for k in frame.index], name=self.by[0])
+        return frame
+
+
+def read_runs(path):
+    """Batch CLI output (.csv / .jsonl) → DataFrame"""
+    if path.lower().endswith((".jsonl", ".ndjson")):
+        return pd.read_json(path, lines=True)
+    return pd.read_csv(path)
+
+
+def main():
+    """batch 단위 누적 갱신이 한 번에 계산한 결과와 같은지 확인"""
+    import time
+
+    rng = np.random.default_rng(23)
+    n = 50_000
+    runs = pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "vehicle": rng.choice([f"V{i}" for i in range(12)], n),
+        "test_date": pd.to_datetime("2025-01-01") + pd.to_timedelta(rng.integers(0, 90, n), unit="D"),
+        "DQM": np.abs(rng.normal(1.5, 0.5, n)),
+        "ER_pct": rng.normal(0.0, 1.5, n),
+    })
+    runs["test_date"] = runs["test_date"].dt.strftime("%Y-%m-%d")
+    runs.loc[rng.integers(0, n, 50), "ER_pct"] = np.nan
+
+    t0 = time.perf_counter()
+    incremental = FleetAggregator()
+    for start in range(0, n, n // 25):
+        incremental.update(runs.iloc[start:start + n // 25])
+    t1 = time.perf_counter()
+    full = FleetAggregator().update(runs)
+
+    a, b = incremental.summary(), full.summary()
+    if not np.allclose(a.to_numpy(dtype=float), b.to_numpy(dtype=float), rtol=1e-10, equal_nan=True):
+        raise AssertionError("incremental summary differs from a full recompute")
+    ta, tb = incremental.trend(), full.trend()
+    if not (ta[["vehicle", "test_date", "runs"]].equals(tb[["vehicle", "test_date", "runs"]])
+            and np.allclose(ta[["mean", "delta"]], tb[["mean", "delta"]], rtol=1e-10, equal_nan=True)):
+        raise AssertionError("incremental trend differs from a full recompute")
+    ref = runs.groupby("vehicle")["DQM"].quantile(0.95)
+    if not np.allclose(a[("DQM", "p95")].to_numpy(), ref.sort_index().to_numpy()):
+        raise AssertionError("p95 differs from pandas quantile")
+
+    flagged = incremental.outliers(runs)
+    print(incremental.ranking().head().to_string())
+    print(f"✓ {n:,} runs in 25 batches ({1e3 * (t1 - t0):.0f} ms) match a full recompute; "
+          f"{int(flagged['outlier'].sum())} outliers flagged")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+SAE J2951 benchmark suite — time, peak memory and agreement of every calculator
+data.csv 를 seed 로 1k … 50M 샘플 합성 trace 를 만들어 계산기별 시간/메모리/일치도를 JSON 으로 기록
+
+    python -m Frame.ReportFrame.sae_bench --out bench_results.json
+    python -m Frame.ReportFrame.sae_bench --sizes 1000 100000 --variants calculate blocked
+    python -m Frame.ReportFrame.sae_bench --scaling 10000000 --workers 1 2 4 8
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from Frame.ReportFrame.SAE_Calculate import sae_j2951_SI
+from Frame.ReportFrame.SAE_J2951 import SAE_J2951
+from Frame.ReportFrame.sae_kernels import CALCULATOR_VERSION, METRIC_KEYS, j2951_columns
+from Frame.ReportFrame.sae_online import OnlineJ2951
+from Frame.ReportFrame.sae_reference import ReferenceCycleCache, j2951_reference
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000, 50_000_000]
+ABCS_SI = np.array([35.5, 1.453, 0.03011])
+MASS_KG = 1726.9
+SEED = 2951
+
+# Pure-Python per-sample variants are only run up to this size by default
+ONLINE_MAX = 200_000
+
+_BENCH_CYCLES = ReferenceCycleCache(max_cycles=2)
+
+_SEED_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+
+
+def _calculate(time_s, Vr, Vs, ABCs, Mass):
+    # no reference-cycle cache: the full two-sided computation every call
+    return {k: v[()] for k, v in j2951_columns(Vr, Vs, ABCs, Mass).items()}
+
+
+def _online(time_s, Vr, Vs, ABCs, Mass):
+    acc = OnlineJ2951(ABCs, Mass)
+    acc.push(np.column_stack([Vr, Vs]))
+    return acc.results()
+
+
+def _batch(time_s, Vr, Vs, ABCs, Mass):
+    return SAE_J2951.calculate_batch(None, [Vr], [Vs], ABCs, Mass).iloc[0].to_dict()
+
+
+def _reference_cycle(time_s, Vr, Vs, ABCs, Mass):
+    # the first timed run fills the cache; the best time is the warm one
+    return j2951_reference(Vr, Vs, ABCs, Mass, cache=_BENCH_CYCLES)
+
+
+def _si(time_s, Vr, Vs, ABCs, Mass):
+    out = sae_j2951_SI(time_s, Vr, Vs, ABCs, Mass)
+    values = [abs(out[k]) for k in METRIC_KEYS]
+    out["DQM"] = sum(values) / 6
+    return out
+
+
+# name → (function, max samples or None)
+VARIANTS = {
+    "calculate": (_calculate, None),
+    "sae_j2951_SI": (_si, None),
+    "blocked": (SAE_J2951.calculate_blocked, None),
+    "parallel": (SAE_J2951.calculate_parallel, None),
+    "batch": (_batch, None),
+    "online": (_online, ONLINE_MAX),
+    "reference_cycle": (_reference_cycle, None),
+}
+
+
+def synthetic_trace(n, seed=SEED, seed_csv=_SEED_CSV):
+    """
+    n-sample (time, Vr_kph, Vs_kph) shaped like data.csv.
+
+    The scheduled speed repeats the seed cycle; the driven speed adds the
+    seed's own driver deviation (Vroll - Vsched), cyclically shifted per
+    repetition, plus a little white noise.
+    """
+    df = pd.read_csv(seed_csv)
+    cols = {c.lower(): c for c in df.columns}
+    vs0 = df[cols.get("vsched") or cols.get("vnom")].to_numpy(dtype=float)
+    vr0 = df[cols.get("vroll") or cols.get("vact")].to_numpy(dtype=float)
+    dev0 = vr0 - vs0
+    m = len(vs0)
+
+    rng = np.random.default_rng(seed)
+    reps = -(-n // m)
+    Vs = np.tile(vs0, reps)[:n]
+    Vr = np.empty(n)
+    for r, shift in enumerate(rng.integers(0, m, reps)):
+        s = r * m
+        e = min(n, s + m)
+        Vr[s:e] = np.roll(dev0, shift)[:e - s]
+    Vr += Vs
+    Vr += rng.normal(0.0, 0.05, n)
+    np.maximum(Vr, 0.0, out=Vr)
+    return np.arange(n) * 0.1, Vr, Vs
+
+
+def _physical_memory():
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _metrics(res):
+    return {k: float(res[k]) for k in METRIC_KEYS + ["DQM"]}
+
+
+def _max_rel_err(a, b):
+    err = 0.0
+    for k in a:
+        if np.isnan(a[k]) and np.isnan(b[k]):
+            continue
+        err = max(err, abs(a[k] - b[k]) / max(abs(b[k]), 1e-300))
+    return err
+
+
+def _predict_peak(history, n):
+    """Affine extrapolation of the peak from the last two measured sizes"""
+    if len(history) < 2:
+        return 0.0
+    (n1, p1), (n2, p2) = history[-2:]
+    slope = max(0.0, (p2 - p1) / (n2 - n1))
+    return max(p2, p2 + slope * (n - n2))
+
+
+def bench_one(fn, trace, repeats):
+    """
+    Returns:
+    - (metrics, best wall time [s], peak traced allocation [bytes])
+    """
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        res = fn(*trace, ABCS_SI, MASS_KG)
+        times.append(time.perf_counter() - t0)
+
+    # Separate run for memory: tracemalloc slows allocation down
+    tracemalloc.start()
+    try:
+        fn(*trace, ABCS_SI, MASS_KG)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return _metrics(res), min(times), peak
+
+
+def run(sizes=DEFAULT_SIZES, variants=None, mem_budget=None, repeats=None, log=sys.stderr):
+    """
+    Benchmark every variant at every size.
+
+    A variant is skipped at a size when its peak memory, extrapolated from
+    the two previous sizes (fixed + per-sample part), would exceed
+    mem_budget [bytes].
+    Agreement is measured against the first variant that ran at that size
+    (SAE_J2951.calculate unless it was skipped).
+
+    Returns:
+    - list of result records (dicts)
+    """
+    names = list(variants or VARIANTS)
+    if mem_budget is None:
+        phys = _physical_memory()
+        mem_budget = phys // 2 if phys else None
+    peaks = {}                      # name → [(n, peak bytes), ...]
+    records = []
+
+    for n in sorted(sizes):
+        trace = synthetic_trace(n)
+        reps = repeats or (5 if n <= 100_000 else 3 if n <= 1_000_000 else 1)
+        reference = None
+        for name in names:
+            fn, max_n = VARIANTS[name]
+            rec = {"variant": name, "n_samples": n}
+            predicted = _predict_peak(peaks.get(name, []), n)
+            if max_n is not None and n > max_n:
+                rec["skipped"] = f"n > {max_n}"
+            elif mem_budget and predicted > mem_budget:
+                rec["skipped"] = f"predicted peak {predicted / 1e6:.0f} MB > budget"
+            else:
+                metrics, best, peak = bench_one(fn, trace, reps)
+                peaks.setdefault(name, []).append((n, peak))
+                if reference is None:
+                    reference = (name, metrics)
+                rec.update({
+                    "repeats": reps,
+                    "time_s": best,
+                    "ns_per_sample": best / n * 1e9,
+                    "peak_mb": peak / 1e6,
+                    "reference": reference[0],
+                    "max_rel_err": _max_rel_err(metrics, reference[1]),
+                    "metrics": metrics,
+                })
+            records.append(rec)
+            if log is not None:
+                if "skipped" in rec:
+                    print(f"{name:>15} {n:>11,}  skipped ({rec['skipped']})", file=log)
+                else:
+                    print(f"{name:>15} {n:>11,}  {rec['time_s']:9.4f} s  "
+                          f"{rec['peak_mb']:9.1f} MB  rel.err {rec['max_rel_err']:.1e}", file=log)
+        del trace
+    return records
+
+
+def scaling(n, workers=None, repeats=3, log=sys.stderr):
+    """
+    Strong scaling of SAE_J2951.calculate_parallel on one n-sample trace,
+    from 1 thread up to every core (or the given thread counts).
+
+    Every run must reproduce the 1-thread result bit for bit.
+
+    Returns:
+    - list of result records (dicts) with speedup and parallel efficiency
+    """
+    workers = sorted(set(workers or range(1, (os.cpu_count() or 1) + 1)))
+    trace = synthetic_trace(n)
+    records = []
+    base = None
+    for w in workers:
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            res = SAE_J2951.calculate_parallel(*trace, ABCS_SI, MASS_KG, workers=w)
+            times.append(time.perf_counter() - t0)
+        metrics = _metrics(res)
+        best = min(times)
+        if base is None:
+            base = (best, metrics)
+        elif metrics != base[1]:
+            raise AssertionError(f"{w} threads changed the result: {metrics} != {base[1]}")
+        rec = {
+            "variant": "parallel",
+            "n_samples": n,
+            "workers": w,
+            "repeats": repeats,
+            "time_s": best,
+            "speedup": base[0] / best,
+            "efficiency": base[0] / best / w,
+            "metrics": metrics,
+        }
+        records.append(rec)
+        if log is not None:
+            print(f"{w:>3} threads {n:>11,}  {best:9.4f} s  speedup {rec['speedup']:5.2f}  "
+                  f"efficiency {rec['efficiency']:4.0%}", file=log)
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SAE J2951 calculators.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Trace lengths in samples (default: 1k … 50M)")
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANTS), default=None,
+                        help="Calculators to run (default: all)")
+    parser.add_argument("--repeats", type=int, default=None,
+                        help="Timed runs per case; the best is reported (default: by size)")
+    parser.add_argument("--mem-budget-mb", type=float, default=None,
+                        help="Skip cases predicted to exceed this peak (default: half of RAM)")
+    parser.add_argument("--out", default="bench_results.json",
+                        help="JSON output; '-' for stdout (default: bench_results.json)")
+    parser.add_argument("--scaling", type=int, default=None, metavar="N_SAMPLES",
+                        help="Instead: thread scaling of the parallel calculator on one trace")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Thread counts for --scaling (default: 1 … cpu_count)")
+    args = parser.parse_args(argv)
+
+    if args.scaling:
+        records = scaling(args.scaling, args.workers, args.repeats or 3)
+    else:
+        mem_budget = args.mem_budget_mb * 1e6 if args.mem_budget_mb else None
+        records = run(args.sizes, args.variants, mem_budget, args.repeats)
+
+    doc = {
+        "commit": _git_commit(),
+        "calculator_version": CALCULATOR_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "abcs_si": ABCS_SI.tolist(),
+        "mass_kg": MASS_KG,
+        "seed": SEED,
+        "results": records,
+    }
+    text = json.dumps(doc, indent=2)
+    if args.out == "-":
+        print(text)
+    else:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+        print(f"✓ {len(records)} results → {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
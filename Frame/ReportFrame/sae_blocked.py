@@ -0,0 +1,200 @@
+"""
+SAE J2951 fused, block-wise kernel for very long logs
+고정 크기 block + halo 로 처리 — 전체 길이 임시 배열 없이 scalar 합만 유지 (thread 병렬 가능)
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from Frame.ReportFrame.sae_kernels import DT_S, LOW_SPEED_MPS, five_point_ma_with_zero_ends, ratings, road_load_si
+
+# Samples on either side of a block that reach into it:
+# two 5-point passes (2 + 2) and the central difference (1).
+HALO = 5
+DEFAULT_BLOCK = 1 << 16
+
+_SUM_KEYS = ["D", "CE", "ASC", "IW"]
+
+
+class BlockWorkspace:
+    """Preallocated scratch buffers for one block (reused for every block)"""
+
+    def __init__(self, block_size=DEFAULT_BLOCK):
+        self.block_size = block_size
+        m = block_size + 2 * HALO
+        self.raw = np.empty(m)
+        self.y1 = np.empty(m)
+        self.Vd = np.empty(m)
+        self.Vt = np.empty(m)
+        self.a = np.empty(m)
+        self.d = np.empty(m)
+        self.f = np.empty(m)
+        self.fi = np.empty(m)
+        self.tmp = np.empty(m)
+        self.mask = np.empty(m, dtype=bool)
+
+
+def _smooth_window(x_kph, lo, hi, ws, V):
+    """Two-pass MA + truncation of x[lo:hi] into V; valid HALO-1 in from cut edges"""
+    m = hi - lo
+    raw, y1, V = ws.raw[:m], ws.y1[:m], V[:m]
+    np.divide(x_kph[lo:hi], 3.6, out=raw)
+    five_point_ma_with_zero_ends(raw, out=y1)
+    five_point_ma_with_zero_ends(y1, out=V)
+    mask = ws.mask[:m]
+    np.less_equal(V, LOW_SPEED_MPS, out=mask)
+    np.copyto(V, 0.0, where=mask)
+    return V
+
+
+def _side_sums(V, lo, s0, s1, coeffs, ws):
+    """Totals of one side over local indices [s0, s1) of a smoothed window"""
+    F0, F1, F2, Me = coeffs
+    m = len(V)
+    k = s1 - s0
+
+    a = ws.a[:m]
+    np.subtract(V[2:], V[:-2], out=a[1:-1])
+    a[1:-1] /= (2 * DT_S)
+    a[0] = 0.0                      # window ends: global ends or outside [s0, s1)
+    a[-1] = 0.0
+    d = ws.d[:m]
+    np.multiply(V, DT_S, out=d)
+    if lo == 0:                     # global first sample
+        d[0] = 0.0
+
+    V, a, d = V[s0:s1], a[s0:s1], d[s0:s1]
+    f, fi, tmp = ws.f[:k], ws.fi[:k], ws.tmp[:k]
+
+    # Frl = F0 + F1·V + F2·V²  (same association as the reference)
+    np.multiply(V, F1, out=f)
+    f += F0
+    np.multiply(V, V, out=tmp)
+    tmp *= F2
+    f += tmp
+    # Feng = max(Frl + Fi, 0)
+    np.multiply(a, Me, out=fi)
+    f += fi
+    np.maximum(f, 0.0, out=f)
+    np.maximum(fi, 0.0, out=fi)
+
+    return {
+        "D": float(d.sum()),
+        "CE": float(np.dot(f, d)),
+        "ASC": float(np.abs(a, out=tmp).sum()),
+        "IW": float(np.dot(fi, d)),
+    }
+
+
+def block_sums(Vr_kph, Vs_kph, start, stop, coeffs, ws):
+    """
+    Partial J2951 totals over samples [start, stop) of the whole trace.
+
+    Reads x[start-HALO : stop+HALO] only, so blocks can be processed in any
+    order (or in parallel) and their totals simply added.
+
+    Returns:
+    - (driven sums, target sums, SSE)
+    """
+    n = len(Vr_kph)
+    lo, hi = max(0, start - HALO), min(n, stop + HALO)
+    s0, s1 = start - lo, stop - lo
+
+    Vd = _smooth_window(Vr_kph, lo, hi, ws, ws.Vd)
+    drv = _side_sums(Vd, lo, s0, s1, coeffs, ws)
+    Vt = _smooth_window(Vs_kph, lo, hi, ws, ws.Vt)
+    tgt = _side_sums(Vt, lo, s0, s1, coeffs, ws)
+
+    err = np.subtract(Vd[s0:s1], Vt[s0:s1], out=ws.tmp[:s1 - s0])
+    return drv, tgt, float(np.dot(err, err))
+
+
+def block_ranges(n, block_size=DEFAULT_BLOCK):
+    """[(start, stop), ...] covering 0 … n"""
+    return [(s, min(n, s + block_size)) for s in range(0, n, block_size)]
+
+
+def combine(parts):
+    """Add up block_sums() results (in the given order)"""
+    drv = dict.fromkeys(_SUM_KEYS, 0.0)
+    tgt = dict.fromkeys(_SUM_KEYS, 0.0)
+    SSE = 0.0
+    for d, t, se in parts:
+        for k in _SUM_KEYS:
+            drv[k] += d[k]
+            tgt[k] += t[k]
+        SSE += se
+    return drv, tgt, SSE
+
+
+def j2951_blocked(time, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, block_size=DEFAULT_BLOCK):
+    """
+    SAE_J2951.calculate with memory bounded by block_size.
+
+    Inputs may be np.memmap arrays; only one block (+ halo) of them is read
+    at a time, and every temporary lives in a reused BlockWorkspace.
+
+    Returns:
+    - dict: same keys as SAE_J2951.calculate
+    """
+    Vr_kph, Vs_kph = _check_inputs(time, Vr_kph, Vs_kph)
+    n = len(Vr_kph)
+    coeffs = tuple(float(c) for c in road_load_si(ABCs_SI, Mass_kg))
+    ws = BlockWorkspace(block_size)
+    parts = (block_sums(Vr_kph, Vs_kph, s, e, coeffs, ws) for s, e in block_ranges(n, block_size))
+    return _results(combine(parts), n)
+
+
+def j2951_parallel(time, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, workers=None, block_size=DEFAULT_BLOCK):
+    """
+    j2951_blocked with the blocks spread over a thread pool.
+
+    NumPy releases the GIL inside the block kernels, so threads run them on
+    separate cores. Each worker takes a contiguous run of blocks with its
+    own BlockWorkspace; the block partition does not depend on the worker
+    count and the partial sums are added in block order, so the result is
+    bit-identical to j2951_blocked for any number of workers.
+
+    Parameters:
+    - workers: threads (default: os.cpu_count(); never more than blocks)
+
+    Returns:
+    - dict: same keys as SAE_J2951.calculate
+    """
+    Vr_kph, Vs_kph = _check_inputs(time, Vr_kph, Vs_kph)
+    n = len(Vr_kph)
+    ranges = block_ranges(n, block_size)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(ranges)))
+    coeffs = tuple(float(c) for c in road_load_si(ABCs_SI, Mass_kg))
+
+    def run(group):
+        ws = BlockWorkspace(block_size)
+        return [block_sums(Vr_kph, Vs_kph, s, e, coeffs, ws) for s, e in group]
+
+    k = -(-len(ranges) // workers)
+    groups = [ranges[i:i + k] for i in range(0, len(ranges), k)]
+    if len(groups) == 1:
+        parts = run(groups[0])
+    else:
+        with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+            parts = [p for group in pool.map(run, groups) for p in group]
+    return _results(combine(parts), n)
+
+
+def _check_inputs(time, Vr_kph, Vs_kph):
+    Vr_kph = np.asarray(Vr_kph, dtype=float)
+    Vs_kph = np.asarray(Vs_kph, dtype=float)
+    n = len(Vr_kph)
+    if not (len(time) == len(Vs_kph) == n):
+        raise ValueError("time, Vr_kph, Vs_kph must have the same length.")
+    if n < 5:
+        raise ValueError("Need ≥5 samples for the 5-point moving average.")
+    return Vr_kph, Vs_kph
+
+
+def _results(sums, n):
+    drv, tgt, SSE = sums
+    res = ratings(drv, tgt, SSE, n)
+    return {k: np.float64(v) for k, v in res.items()}
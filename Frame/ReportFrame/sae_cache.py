@@ -0,0 +1,145 @@
+"""
+Content-addressed disk cache for SAE J2951 results
+파일 내용 hash + 컬럼 매핑 + ABC 계수 + 질량 + 계산기 버전을 key 로 결과를 저장 (LRU, 용량 제한)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+from Frame.ReportFrame.sae_io import TRACE_ALIASES
+from Frame.ReportFrame.sae_kernels import CALCULATOR_VERSION
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "mechlab", "j2951")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """blake2b of the raw file bytes (the file is read, never parsed)"""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _atomic_write(path, text):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class ResultCache:
+    """
+    Disk-backed LRU cache of J2951 result dicts.
+
+    One JSON file per key; a hit refreshes the entry's mtime and eviction
+    removes the least recently used entries (results and content-hash
+    memos alike) once the directory exceeds max_bytes. Writes are atomic (temp file + rename), so several processes
+    of a batch run can share one directory.
+
+    File content hashes are memoized by (path, size, mtime), so a repeated
+    lookup of an unchanged file does not even re-read it.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, "digests"), exist_ok=True)
+
+    def content_hash(self, path):
+        st = os.stat(path)
+        stamp = f"{st.st_size} {st.st_mtime_ns}"
+        memo = os.path.join(self.directory, "digests",
+                            hashlib.sha1(os.path.abspath(path).encode()).hexdigest())
+        try:
+            with open(memo) as f:
+                saved_stamp, digest = f.read().rsplit(" ", 1)
+            if saved_stamp == stamp:
+                os.utime(memo)          # LRU recency, as for result entries
+                return digest
+        except (OSError, ValueError):
+            pass
+        digest = file_digest(path)
+        _atomic_write(memo, f"{stamp} {digest}")
+        return digest
+
+    def key(self, path, ABCs_SI, Mass_kg, calculator="SAE_J2951", columns=TRACE_ALIASES):
+        """Cache key for one (file, parameters, calculator) combination"""
+        spec = json.dumps({
+            "file": self.content_hash(path),
+            "columns": columns,         # a change to the alias rules invalidates entries
+            "ABCs_SI": [float(c) for c in ABCs_SI],
+            "Mass_kg": float(Mass_kg),
+            "calculator": calculator,
+            "version": CALCULATOR_VERSION,
+        }, sort_keys=True)
+        return hashlib.sha256(spec.encode()).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        """Cached result dict, or None"""
+        path = self._entry(key)
+        try:
+            with open(path) as f:
+                results = json.load(f)
+            os.utime(path)
+            return results
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, results):
+        _atomic_write(self._entry(key), json.dumps({k: float(v) for k, v in results.items()}))
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries and digest memos until the cache fits max_bytes"""
+        entries = []
+        total = 0
+        for directory, is_entry in ((self.directory, lambda name: name.endswith(".json")),
+                                    (os.path.join(self.directory, "digests"), lambda name: not name.endswith(".tmp"))):
+            try:
+                it = os.scandir(directory)
+            except OSError:
+                continue
+            with it:
+                for e in it:
+                    if not is_entry(e.name):
+                        continue
+                    try:
+                        st = e.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime_ns, st.st_size, e.path))
+                    total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def get_or_compute(self, path, ABCs_SI, Mass_kg, compute, calculator="SAE_J2951"):
+        """
+        Returns:
+        - (results, hit): compute() is called only on a miss
+        """
+        key = self.key(path, ABCs_SI, Mass_kg, calculator=calculator)
+        results = self.get(key)
+        if results is not None:
+            return results, True
+        results = compute()
+        self.put(key, results)
+        return results, False
@@ -0,0 +1,251 @@
+"""
+Headless command-line entry point for SAE J2951
+score / batch / report / bench 하위 명령 — 무거운 모듈은 명령을 실행할 때만 import 하고 결과는 JSON 으로 출력 (wx / display 불필요)
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import sys
+
+# Default road-load coefficients (SI) and test mass, shared by every subcommand
+DEFAULT_F0_N = 35.5
+DEFAULT_F1_N_PER_KPH = 1.453
+DEFAULT_F2_N_PER_KPH2 = 0.03011
+DEFAULT_MASS_KG = 1726.9
+
+
+def _jsonable(value):
+    """numpy scalars / arrays → Python, NaN / inf → null (strict JSON)"""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if hasattr(value, "tolist"):
+        return _jsonable(value.tolist())
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _emit(doc):
+    print(json.dumps(_jsonable(doc), indent=2, ensure_ascii=False))
+
+
+def _params(args):
+    import numpy as np
+
+    return np.array([args.F0_N, args.F1_N_per_kph, args.F2_N_per_kph2], dtype=float), float(args.mass_kg)
+
+
+def _load_trace(path, align):
+    """Read, put on the 10 Hz grid and optionally align one log"""
+    from Frame.ReportFrame.sae_align import align_trace
+    from Frame.ReportFrame.sae_io import read_trace
+    from Frame.ReportFrame.sae_resample import to_j2951_grid
+
+    time_s, Vs_kph, Vr_kph, _ = to_j2951_grid(*read_trace(path))
+    if align:
+        Vr_kph, _ = align_trace(Vr_kph, Vs_kph)
+    return time_s, Vs_kph, Vr_kph
+
+
+# --- subcommands ------------------------------------------------------------
+def cmd_score(args):
+    ABCs_SI, Mass_kg = _params(args)
+    if args.phases:
+        from Frame.ReportFrame.sae_phases import j2951_phases
+
+        time_s, Vs_kph, Vr_kph = _load_trace(args.file, args.align)
+        table = j2951_phases(time_s, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, boundary=args.phases)
+        _emit({"file": args.file, "boundary": args.phases, "phases": table.to_dict(orient="records")})
+        return 0
+
+    if args.segment:
+        from Frame.ReportFrame.sae_segment import score_drive_segments
+
+        time_s, Vs_kph, Vr_kph = _load_trace(args.file, args.align)
+        table = score_drive_segments(time_s, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, level=args.segment)
+        _emit({"file": args.file, "segments": table.to_dict(orient="records")})
+        return 0 if not table.empty and (table["error"] == "").all() else 1
+
+    # sae_score, not SAE_Calculate: no pandas / sqlite / results store on the plain scoring path
+    from Frame.ReportFrame.sae_score import score_file
+
+    row = score_file(args.file, ABCs_SI, Mass_kg, cache_dir=args.cache_dir or None, align=args.align)
+    if args.db and not row["error"]:
+        from Frame.ReportFrame.sae_cache import file_digest
+        from Frame.ReportFrame.sae_store import ResultStore, make_record
+
+        with ResultStore(args.db) as store:
+            row["id"] = store.insert(make_record(
+                row, ABCs_SI, Mass_kg, vehicle=args.vehicle, test_id=args.id,
+                source_file=args.file, source_hash=file_digest(args.file), calculator="sae_cli"))
+    _emit(row)
+    return 1 if row["error"] else 0
+
+
+def cmd_batch(args):
+    from Frame.ReportFrame.SAE_Calculate import iter_input_files, run_batch
+
+    ABCs_SI, Mass_kg = _params(args)
+    # run_batch 의 진행 메시지는 stderr 로, stdout 은 JSON 요약만
+    with contextlib.redirect_stdout(sys.stderr) if args.out != "-" else contextlib.nullcontext():
+        counts = run_batch(iter_input_files(args.dir or args.glob), ABCs_SI, Mass_kg, args.out,
+                           workers=args.workers, chunksize=max(1, args.chunksize),
+                           cache_dir=args.cache_dir or None, align=args.align,
+                           store_path=args.db or None, vehicle=args.vehicle)
+    if args.out != "-":
+        _emit({**counts, "out": args.out})
+    return 1 if counts["failed"] else 0
+
+
+def cmd_report(args):
+    if args.file:
+        return _report_run(args)
+    return _report_fleet(args)
+
+
+def _report_modules():
+    """openpyxl / matplotlib (Agg, no display) are imported only when a report is asked for"""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        from Frame.ReportFrame import sae_report_generator
+    except ImportError as exc:
+        sys.exit(f"j2951 report: needs matplotlib and openpyxl ({exc})")
+    return sae_report_generator
+
+
+def _report_run(args):
+    from Frame.ReportFrame.SAE_J2951 import SAE_J2951
+
+    ABCs_SI, Mass_kg = _params(args)
+    time_s, Vs_kph, Vr_kph = _load_trace(args.file, args.align)
+    results = SAE_J2951.calculate(time_s, Vr_kph, Vs_kph, ABCs_SI, Mass_kg)
+    test_info = {
+        "Test ID": args.id,
+        "Vehicle ID": args.vehicle or "",
+        "Mass": str(Mass_kg),
+        "F0_N": str(ABCs_SI[0]),
+        "F1_N_per_kph": str(ABCs_SI[1]),
+        "F2_N_per_kph2": str(ABCs_SI[2]),
+    }
+
+    reports = _report_modules()
+    with contextlib.redirect_stdout(sys.stderr):
+        paths = reports.generate_reports(results, test_info, output_prefix=args.prefix,
+                                         template_path=args.template or None)
+    _emit({"file": args.file, "results": dict(results), "reports": paths})
+    return 0
+
+
+def _report_fleet(args):
+    from Frame.ReportFrame.sae_aggregate import FleetAggregator, read_runs
+
+    aggregator = FleetAggregator(by=args.by, metrics=args.metrics)
+    if args.db:
+        from Frame.ReportFrame.sae_store import ResultStore
+
+        with ResultStore(args.db) as store:
+            aggregator.update_from_store(store, since=args.since, until=args.until)
+    else:
+        runs = read_runs(args.runs)
+        # 예전 batch 출력에는 vehicle / test_date 가 없음 — 한 NaN group 으로 뭉치지 않게 거부
+        missing = [c for c in [*args.by, "test_date"] if c not in runs or runs[c].isna().all()]
+        if missing:
+            sys.exit(f"j2951 report: {args.runs} has no {', '.join(missing)} values; "
+                     f"re-run 'j2951 batch --vehicle NAME' or group with --by columns it has")
+        aggregator.update(runs)
+    if not aggregator.n_runs:
+        _emit({"runs": 0, "reports": {}})
+        return 1
+
+    reports = _report_modules()
+    paths = {"excel": f"{args.prefix}.xlsx", "pdf": f"{args.prefix}.pdf"}
+    with contextlib.redirect_stdout(sys.stderr):
+        reports.create_fleet_excel_report(aggregator, paths["excel"])
+        reports.create_fleet_pdf_report(aggregator, paths["pdf"])
+    ranking = aggregator.ranking(args.metrics[0]).reset_index()
+    _emit({"runs": aggregator.n_runs, "ranking": ranking.to_dict(orient="records"), "reports": paths})
+    return 0
+
+
+def cmd_bench(args):
+    from Frame.ReportFrame import sae_bench
+
+    sae_bench.main(args.bench_args)
+    return 0
+
+
+# --- parser -----------------------------------------------------------------
+def build_parser():
+    params = argparse.ArgumentParser(add_help=False)
+    params.add_argument("--F0_N", type=float, default=DEFAULT_F0_N)
+    params.add_argument("--F1_N_per_kph", type=float, default=DEFAULT_F1_N_PER_KPH)
+    params.add_argument("--F2_N_per_kph2", type=float, default=DEFAULT_F2_N_PER_KPH2)
+    params.add_argument("--mass_kg", type=float, default=DEFAULT_MASS_KG)
+    params.add_argument("--align", action="store_true",
+                        help="Estimate the Vroll lag (FFT cross-correlation) and shift it out before scoring.")
+    params.add_argument("--vehicle", default=None, help="Vehicle name recorded with the results")
+
+    parser = argparse.ArgumentParser(prog="j2951", description="SAE J2951 drive quality metrics (headless).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("score", parents=[params], help="Score one log; prints the result row as JSON.")
+    p.add_argument("file", help="Drive log (.csv): time, Vsched, Vroll")
+    p.add_argument("--id", default=None, help="Test ID recorded with --db (default: none)")
+    p.add_argument("--segment", choices=["cycle", "microtrip"], default=None,
+                   help="Split the log at stops and score every cycle / micro-trip.")
+    p.add_argument("--phases", choices=["continuous", "restart"], default=None,
+                   help="Score each WLTC class 3 phase plus the total; 'continuous' smooths across "
+                        "phase boundaries, 'restart' scores every phase as a standalone trace.")
+    p.add_argument("--cache-dir", default="", help="Reuse results of unchanged files.")
+    p.add_argument("--db", default="", help="Also record the run in this SQLite results store.")
+    p.set_defaults(func=cmd_score)
+
+    p = sub.add_parser("batch", parents=[params], help="Score many logs in parallel; prints counts as JSON.")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--dir", default="", help="Score every *.csv below this directory.")
+    src.add_argument("--glob", default="", help="Score every file matching this glob.")
+    p.add_argument("--out", default="j2951_results.csv",
+                   help="Result rows, .csv or .jsonl; '-' streams JSON lines to stdout.")
+    p.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    p.add_argument("--chunksize", type=int, default=8, help="Files per submitted task (default: 8)")
+    p.add_argument("--cache-dir", default="", help="Reuse results of unchanged files.")
+    p.add_argument("--db", default="", help="Also bulk-insert the rows into this SQLite results store.")
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("report", parents=[params],
+                       help="Excel + PDF report of one log, or a fleet summary of many runs.")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--file", default="", help="Report on this log.")
+    src.add_argument("--db", default="", help="Fleet summary of the runs in this SQLite results store.")
+    src.add_argument("--runs", default="", help="Fleet summary of a batch output (.csv / .jsonl).")
+    p.add_argument("--prefix", default="sae_j2951_report", help="Output path prefix")
+    p.add_argument("--id", default="run-1", help="Test ID shown in a single-log report")
+    p.add_argument("--template", default="", help="Excel template for a single-log report")
+    p.add_argument("--by", nargs="+", default=["vehicle"], help="Fleet grouping columns (default: vehicle)")
+    p.add_argument("--metrics", nargs="+", default=["DQM", "ER_pct"], help="Fleet metrics (default: DQM ER_pct)")
+    p.add_argument("--since", default=None, help="First test date (YYYY-MM-DD) read from --db")
+    p.add_argument("--until", default=None, help="Last test date (YYYY-MM-DD) read from --db")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("bench", help="Benchmark the calculators (other arguments are passed to sae_bench).")
+    p.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "bench":
+        args.bench_args = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Gap-aware conditioning of drive traces (NaN runs)
+짧은 NaN 구간은 선형 보간, 긴 구간은 segment 분할 (또는 제거) — 처리 내역을 report 로 반환
+"""
+
+import numpy as np
+
+from Frame.ReportFrame.sae_kernels import DT_S, ratings, road_load_si, runs, side_sums, span_mask, speed_profile
+
+DEFAULT_MAX_INTERP_S = 1.0     # gaps up to this long are interpolated
+MIN_SEGMENT_SAMPLES = 5        # shorter pieces between long gaps are dropped
+
+_SUM_KEYS = ["D", "CE", "ASC", "IW"]
+
+
+def condition_trace(Vr_kph, Vs_kph, dt=DT_S, max_interp_s=DEFAULT_MAX_INTERP_S,
+                    long_gaps="split", min_segment=MIN_SEGMENT_SAMPLES):
+    """
+    Fill or isolate NaN runs so that one bad cell no longer turns every
+    rating into NaN.
+
+    A gap is a run of samples where either speed is not finite.
+    - interior gaps of at most max_interp_s: linear interpolation of the
+      missing channel(s) between the neighbouring samples
+    - longer gaps and gaps at either end: excluded. With long_gaps='split'
+      the trace is cut into segments that are scored separately and summed;
+      with long_gaps='drop' the gap samples are removed and the rest joined
+    - pieces shorter than min_segment samples between long gaps are dropped
+
+    Returns:
+    - Vr_kph, Vs_kph: conditioned copies (long gaps still NaN for 'split',
+      removed for 'drop')
+    - segments: list of (start, stop) index ranges to score
+    - report: dict of what was done; report['kept'] is the input index of
+      every returned sample (fewer than the input for 'drop'), so
+      per-sample output can be put back on the input time axis
+    """
+    Vr_kph = np.array(Vr_kph, dtype=float)
+    Vs_kph = np.array(Vs_kph, dtype=float)
+    if long_gaps not in ("split", "drop"):
+        raise ValueError("long_gaps must be 'split' or 'drop'.")
+    n = len(Vr_kph)
+
+    bad = ~(np.isfinite(Vr_kph) & np.isfinite(Vs_kph))
+    starts, stops = runs(bad)
+    lengths = stops - starts
+    interior = (starts > 0) & (stops < n)
+    short = interior & (lengths * dt <= max_interp_s)
+
+    fill = span_mask(n, starts[short], stops[short])
+    idx = np.arange(n, dtype=float)
+    for x in (Vr_kph, Vs_kph):
+        missing = fill & ~np.isfinite(x)
+        if missing.any():
+            ok = np.isfinite(x)
+            x[missing] = np.interp(idx[missing], idx[ok], x[ok])
+
+    excluded = span_mask(n, starts[~short], stops[~short])
+    seg_starts, seg_stops = runs(~excluded)
+    keep = (seg_stops - seg_starts) >= min_segment
+    dropped = int((seg_stops - seg_starts)[~keep].sum())
+    if dropped:
+        excluded |= span_mask(n, seg_starts[~keep], seg_stops[~keep])
+    segments = [(int(s), int(e)) for s, e in zip(seg_starts[keep], seg_stops[keep])]
+
+    report = {
+        "n_in": n,
+        "bad_samples": int(bad.sum()),
+        "gaps": int(len(starts)),
+        "interpolated_gaps": int(short.sum()),
+        "interpolated_samples": int(lengths[short].sum()),
+        "long_gaps": int((~short).sum()),
+        "masked_samples": int(excluded.sum()),
+        "masked_s": float(excluded.sum() * dt),
+        "max_gap_s": float(lengths.max() * dt) if len(lengths) else 0.0,
+        "segments": len(segments),
+        "dropped_segment_samples": dropped,
+        "long_gaps_policy": long_gaps,
+    }
+
+    report["kept"] = np.arange(n)
+    if long_gaps == "drop" and excluded.any():
+        Vr_kph, Vs_kph = Vr_kph[~excluded], Vs_kph[~excluded]
+        segments = [(0, len(Vr_kph))] if len(Vr_kph) >= min_segment else []
+        report["kept"] = np.flatnonzero(~excluded)
+    return Vr_kph, Vs_kph, segments, report
+
+
+def segment_sums(Vr_kph, Vs_kph, segments, ABCs_SI, Mass_kg):
+    """
+    Side totals over segments, each scored as a standalone trace (its own
+    zeroed-end smoothing), added up.
+
+    Returns:
+    - (drv, tgt, SSE, n)
+    """
+    F0, F1, F2, Me = road_load_si(ABCs_SI, Mass_kg)
+    drv = dict.fromkeys(_SUM_KEYS, 0.0)
+    tgt = dict.fromkeys(_SUM_KEYS, 0.0)
+    SSE = 0.0
+    n = 0
+    for s, e in segments:
+        prof = speed_profile(Vr_kph[s:e], Vs_kph[s:e])
+        d = side_sums(prof["Vd"], prof["ad"], prof["dd"], F0, F1, F2, Me)
+        t = side_sums(prof["Vt"], prof["at"], prof["dtm"], F0, F1, F2, Me)
+        for k in _SUM_KEYS:
+            drv[k] += d[k]
+            tgt[k] += t[k]
+        SSE += prof["SSE"]
+        n += e - s
+    return drv, tgt, SSE, n
+
+
+def j2951_conditioned(Vr_kph, Vs_kph, ABCs_SI, Mass_kg, **options):
+    """
+    Condition the trace (see condition_trace) and score what is left.
+
+    Returns:
+    - (results dict: METRIC_KEYS + DQM as 0-d arrays, report)
+    """
+    Vr_kph, Vs_kph, segments, report = condition_trace(Vr_kph, Vs_kph, **options)
+    return score_segments(Vr_kph, Vs_kph, segments, ABCs_SI, Mass_kg), report
+
+
+def score_segments(Vr_kph, Vs_kph, segments, ABCs_SI, Mass_kg):
+    """Ratings of conditioned segments (see segment_sums)"""
+    if not segments:
+        raise ValueError("No segment of ≥5 valid samples left after removing gaps.")
+    return ratings(*segment_sums(Vr_kph, Vs_kph, segments, ABCs_SI, Mass_kg))
+
+
+def summary_values(report):
+    """Scalar part of a conditioning report for results dicts / tables"""
+    return {
+        "gaps_interpolated": report["interpolated_gaps"],
+        "gaps_masked": report["long_gaps"],
+        "masked_s": report["masked_s"],
+    }
+
+
+def main():
+    """data.csv 에 NaN 을 넣어 보간/분할 결과 확인"""
+    import os
+
+    from Frame.ReportFrame.SAE_J2951 import SAE_J2951
+    from Frame.ReportFrame.sae_io import read_trace
+
+    t, vs, vr = read_trace(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv"))
+    abc, mass = np.array([35.5, 1.453, 0.03011]), 1726.9
+    clean = SAE_J2951.calculate(t, vr, vs, abc, mass)
+
+    res, rep = j2951_conditioned(vr, vs, abc, mass)
+    if any(res[k] != clean[k] for k in clean):
+        raise AssertionError("clean trace must score exactly as SAE_J2951.calculate")
+
+    bad = vr.copy()
+    bad[5000] = np.nan                  # one corrupt row
+    bad[9000:9004] = np.nan             # short dropout
+    bad[12000:12600] = np.nan           # 60 s logger outage
+    res, rep = j2951_conditioned(bad, vs, abc, mass)
+    print({k: v for k, v in rep.items() if k != "kept"})
+    for k in clean:
+        print(f"  {k:<10} clean {float(clean[k]):9.4f}   conditioned {float(res[k]):9.4f}")
+
+    # 'drop' 은 샘플을 빼고 이어붙이지만 trace 는 입력 시간축에 그대로 놓여야 함
+    for policy in ("split", "drop"):
+        res = SAE_J2951.calculate(t, bad, vs, abc, mass, long_gaps=policy)
+        traces = res.traces
+        if any(len(v) != len(t) for v in traces.values()):
+            raise AssertionError(f"{policy}: traces must cover every input sample")
+        if not (np.isnan(traces["CE_driven_J"][12000:12600]).all()
+                and np.isfinite(traces["CE_driven_J"][12600:]).all()):
+            raise AssertionError(f"{policy}: the outage must stay where it was on the time axis")
+        if not np.isclose(traces["ER_running_pct"][-1], res["ER_pct"], rtol=1e-12):
+            raise AssertionError(f"{policy}: running ER must end at the rating")
+    print("✓ conditioning keeps every rating finite; traces stay on the input time axis")
+
+
+if __name__ == "__main__":
+    main()
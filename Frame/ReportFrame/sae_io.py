@@ -0,0 +1,192 @@
+"""
+Fast drive-trace CSV loader (time, Vsched, Vroll)
+구분자와 header alias 는 파일 앞부분에서 한 번만 판별하고, 필요한 3 개 컬럼만 C / pyarrow engine 으로 float64 로 읽음
+pyarrow 가 있으면 pandas 를 import 하지 않음 (j2951 score 의 시작 시간)
+
+    python -m Frame.ReportFrame.sae_io --rows 2000000     # 기존 python engine 대비 benchmark
+"""
+
+import codecs
+import csv
+import importlib.util
+import os
+
+import numpy as np
+
+# Accepted header names (case-insensitive), in order of preference
+TRACE_ALIASES = {
+    "time": ("time", "t"),
+    "vsched": ("vsched", "vnom"),
+    "vroll": ("vroll", "vact"),
+}
+
+SNIFF_BYTES = 64 * 1024
+_DELIMITERS = ",;\t|"
+
+
+def default_engine():
+    """'pyarrow' when it is installed, otherwise pandas' C parser"""
+    return "pyarrow" if importlib.util.find_spec("pyarrow") is not None else "c"
+
+
+def sniff_trace_csv(path, sniff_bytes=SNIFF_BYTES):
+    """
+    Delimiter, encoding and column names of a trace CSV, from its first bytes.
+
+    Returns:
+    - dict: {'delimiter', 'encoding', 'header', 'columns': {'time', 'vsched', 'vroll'}}
+    """
+    with open(path, "rb") as f:
+        raw = f.read(sniff_bytes)
+    encoding = "utf-8-sig" if raw.startswith(codecs.BOM_UTF8) else "utf-8"
+    lines = raw.decode(encoding, errors="replace").splitlines()
+    if len(raw) == sniff_bytes and len(lines) > 1:
+        lines = lines[:-1]                      # last line may be cut off
+    if not lines:
+        raise ValueError(f"{path} is empty.")
+
+    try:
+        delimiter = csv.Sniffer().sniff("\n".join(lines[:50]), delimiters=_DELIMITERS).delimiter
+    except csv.Error:
+        counts = {d: lines[0].count(d) for d in _DELIMITERS}
+        delimiter = max(counts, key=counts.get) if any(counts.values()) else ","
+
+    header = next(csv.reader([lines[0]], delimiter=delimiter))
+    cols = {c.lower(): c for c in header}
+    columns = {}
+    for key, aliases in TRACE_ALIASES.items():
+        name = next((cols[a] for a in aliases if a in cols), None)
+        if name is None:
+            raise ValueError(f"No {'/'.join(aliases)} column in {os.path.basename(path)} "
+                             f"(columns: {header})")
+        columns[key] = name
+
+    return {"delimiter": delimiter, "encoding": encoding, "header": header, "columns": columns}
+
+
+def read_trace(path, fmt=None, engine=None):
+    """
+    Trace CSV → (time_s, Vs_kph, Vr_kph) as float64 arrays.
+
+    Only the three mapped columns are parsed. Cells that are not numbers
+    become NaN, as with pd.to_numeric(errors='coerce').
+
+    Parameters:
+    - fmt: result of sniff_trace_csv (sniffed when None)
+    - engine: 'pyarrow' or 'c' (default: default_engine())
+    """
+    fmt = fmt or sniff_trace_csv(path)
+    names = [fmt["columns"][k] for k in ("time", "vsched", "vroll")]
+    engine = engine or default_engine()
+    if engine == "pyarrow":
+        try:
+            return _read_arrow(path, fmt, names)
+        except ValueError:
+            pass                                # non-numeric cells: coerced by the pandas path below
+
+    import pandas as pd
+
+    kwargs = {"sep": fmt["delimiter"], "usecols": names}
+    try:
+        df = pd.read_csv(path, engine="c", dtype={n: np.float64 for n in names},
+                         encoding=fmt["encoding"], **kwargs)
+    except ValueError:
+        # Non-numeric cells: parse as text and coerce, like the old loader
+        df = pd.read_csv(path, engine="c", dtype=str, encoding=fmt["encoding"],
+                         sep=fmt["delimiter"], usecols=names)
+        df = df.apply(pd.to_numeric, errors="coerce")
+    return tuple(df[n].to_numpy(dtype=np.float64) for n in names)
+
+
+def _read_arrow(path, fmt, names):
+    """The three columns straight through pyarrow.csv (what pandas' pyarrow engine does, without pandas)"""
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    table = pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(encoding="utf8" if fmt["encoding"] == "utf-8-sig" else fmt["encoding"]),
+        parse_options=pa_csv.ParseOptions(delimiter=fmt["delimiter"]),
+        convert_options=pa_csv.ConvertOptions(include_columns=names,
+                                              column_types={n: pa.float64() for n in names}))
+    return tuple(_float_column(table.column(n)) for n in names)
+
+
+def _float_column(column):
+    """
+    pyarrow float64 column → writable float64 array, nulls as NaN.
+    Read from the Arrow buffers: pyarrow's to_numpy() imports pandas.
+    """
+    arr = column.combine_chunks()
+    validity, data = arr.buffers()
+    values = np.frombuffer(data, dtype=np.float64, count=arr.offset + len(arr))[arr.offset:].copy()
+    if arr.null_count:
+        bits = np.unpackbits(np.frombuffer(validity, dtype=np.uint8), bitorder="little")
+        values[~bits[arr.offset:arr.offset + len(arr)].astype(bool)] = np.nan
+    return values
+
+
+def _read_legacy(path):
+    """The python-engine loader this module replaces (benchmark baseline)"""
+    import pandas as pd
+
+    df = pd.read_csv(path, sep=None, engine="python")
+    cols = {c.lower(): c for c in df.columns}
+    time_col = cols.get("time") or cols.get("t") or "time"
+    vs_col = cols.get("vsched") or cols.get("vnom") or "Vsched"
+    vr_col = cols.get("vroll") or cols.get("vact") or "Vroll"
+    return tuple(pd.to_numeric(df[c], errors="coerce").to_numpy() for c in (time_col, vs_col, vr_col))
+
+
+def main():
+    """data.csv 를 N 행으로 늘려 기존 loader 와 속도/결과 비교"""
+    import argparse
+    import tempfile
+    import time
+
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Benchmark the trace CSV loader.")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--sep", default=";", help="Delimiter of the generated file (default: ';')")
+    args = parser.parse_args()
+
+    seed = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv"))
+    reps = -(-args.rows // len(seed))
+    df = pd.concat([seed] * reps, ignore_index=True).iloc[:args.rows]
+    df.iloc[:, 0] = np.arange(len(df)) * 0.1
+    df["extra"] = 0                              # a column the loader should skip
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.csv")
+        df.to_csv(path, sep=args.sep, index=False)
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"{len(df):,} rows, {size_mb:.1f} MB, sep={args.sep!r}")
+
+        loaders = [("python engine (old)", _read_legacy),
+                   ("sniff + c", lambda p: read_trace(p, engine="c"))]
+        if default_engine() == "pyarrow":
+            loaders.append(("sniff + pyarrow", lambda p: read_trace(p, engine="pyarrow")))
+
+        expected = None
+        base = None
+        for name, load in loaders:
+            t0 = time.perf_counter()
+            arrays = load(path)
+            dt = time.perf_counter() - t0
+            if expected is None:
+                expected, base = arrays, dt
+            # pyarrow rounds 17-digit decimals correctly where pandas' parsers
+            # can be 1 ulp off, so compare to within a couple of ulps
+            elif not all(np.allclose(a, b, rtol=4e-16, atol=0.0, equal_nan=True)
+                         for a, b in zip(arrays, expected)):
+                raise AssertionError(f"{name}: arrays differ from the python-engine loader")
+            same = all(np.array_equal(a, b, equal_nan=True) for a, b in zip(arrays, expected))
+            print(f"  {name:<20} {dt:8.3f} s   {size_mb / dt:7.1f} MB/s   ×{base / dt:5.1f}"
+                  f"   {'identical' if same else '≤ 1 ulp'}")
+
+    print("✓ all loaders agree")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+SAE J2951 numeric kernels
+SAE_J2951.calculate 와 SAE_Calculate.sae_j2951_SI 가 공유하는 벡터화 연산
+"""
+
+import numpy as np
+
+# Bump whenever a change alters computed values (invalidates cached results)
+CALCULATOR_VERSION = "j2951-kernels-3"
+
+DT_S = 0.1            # J2951 fixed sample period [s]
+LOW_SPEED_MPS = 0.03  # speeds at or below this are truncated to 0 [m/s]
+MPS_TO_MPH = 2.237
+
+METRIC_KEYS = ["ER_pct", "DR_pct", "EER_pct", "ASCR_pct", "IWR_pct", "RMSSE_mph"]
+
+
+def five_point_ma_with_zero_ends(x, out=None):
+    """
+    5-point centred moving average; the first two and last two samples are 0.
+
+    The window is summed left-to-right exactly like the original per-element
+    loop, so the result is bit-identical to it.
+
+    Parameters:
+    - x: 1-D speed array
+    - out: optional preallocated output (must not alias x)
+
+    Returns:
+    - y: smoothed array
+    """
+    x = np.asarray(x, dtype=float)
+    if out is None:
+        y = np.empty_like(x)
+    else:
+        y = out
+
+    n = x.shape[-1]
+    if n >= 5:
+        mid = y[..., 2:-2]
+        np.add(x[..., :-4], x[..., 1:-3], out=mid)
+        mid += x[..., 2:-2]
+        mid += x[..., 3:-1]
+        mid += x[..., 4:]
+        mid /= 5.0
+        y[..., :2] = 0.0
+        y[..., -2:] = 0.0
+    else:
+        y[...] = 0.0
+    return y
+
+
+def smooth_speed(v_mps, lengths=None):
+    """
+    Two-pass 5-point moving average followed by low-speed truncation.
+
+    Parameters:
+    - v_mps: speed [m/s], 1-D or 2-D (runs x samples, zero padded)
+    - lengths: valid sample count per row for padded 2-D input
+
+    Returns:
+    - V: smoothed speed [m/s]; 0 from each row's last two valid samples on
+    """
+    if lengths is None:
+        tmp = five_point_ma_with_zero_ends(v_mps)
+        V = five_point_ma_with_zero_ends(tmp)
+    else:
+        v_mps = np.asarray(v_mps, dtype=float)
+        tail = np.arange(v_mps.shape[-1]) >= (np.asarray(lengths)[:, None] - 2)
+        tmp = five_point_ma_with_zero_ends(v_mps)
+        tmp[tail] = 0.0
+        V = five_point_ma_with_zero_ends(tmp)
+        V[tail] = 0.0
+    V[V <= LOW_SPEED_MPS] = 0.0
+    return V
+
+
+def runs(mask):
+    """(starts, stops) of the True runs of a boolean array"""
+    edges = np.diff(np.concatenate([[False], mask, [False]]).astype(np.int8))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def span_mask(n, starts, stops):
+    """Boolean mask that is True on every [start, stop) span"""
+    marks = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(marks, starts, 1)
+    np.add.at(marks, stops, -1)
+    return np.cumsum(marks[:-1]) > 0
+
+
+def road_load_si(ABCs_SI, Mass_kg):
+    """
+    Dyno coefficients [F0 N, F1 N/kph, F2 N/kph²] and ETW [kg] → SI for m/s.
+
+    Returns:
+    - (F0 [N], F1 [N/(m/s)], F2 [N/(m/s)²], Me [kg]) — Me = 1.015 * ETW
+    """
+    ABCs_SI = np.asarray(ABCs_SI, dtype=float)
+    F0 = ABCs_SI[..., 0]
+    F1 = ABCs_SI[..., 1] * 3.6
+    F2 = ABCs_SI[..., 2] * (3.6 * 3.6)
+    Me = 1.015 * np.asarray(Mass_kg, dtype=float)
+    return F0, F1, F2, Me
+
+
+def speed_terms(V):
+    """
+    Central-difference acceleration and per-step distance, dt = 0.1 s.
+
+    Returns:
+    - a: acceleration [m/s²] (0 at both ends)
+    - d: distance travelled in each step [m] (0 at the first sample)
+    """
+    a = np.zeros_like(V)
+    a[..., 1:-1] = (V[..., 2:] - V[..., :-2]) / (2 * DT_S)
+    d = np.zeros_like(V)
+    d[..., 1:] = V[..., 1:] * DT_S
+    return a, d
+
+
+def engine_force(V, a, F0, F1, F2, Me):
+    """
+    Positive-only tractive force of one side [N] (road load + inertia,
+    clipped at 0), and the inertial force Me·a.
+
+    Returns:
+    - (Feng, Fi)
+    """
+    Frl = F0 + F1 * V + F2 * (V ** 2)
+    Fi = Me * a
+    Feng = np.where(Frl + Fi >= 0.0, Frl + Fi, 0.0)
+    return Feng, Fi
+
+
+def sample_terms(V, a, d, F0, F1, F2, Me):
+    """
+    Per-sample contributions of one side (driven or target) of the trace.
+
+    Coefficients broadcast against V, so per-run values of a 2-D batch
+    are passed with shape (runs, 1).
+
+    Returns:
+    - dict of arrays: D (step distance), CE (engine work), ASC (|a|),
+      IW (positive inertial work)
+    """
+    Feng, Fi = engine_force(V, a, F0, F1, F2, Me)
+    return {
+        "D": d,
+        "CE": Feng * d,
+        "ASC": np.abs(a),
+        "IW": np.maximum(Fi, 0.0) * d,
+    }
+
+
+def side_sums(V, a, d, F0, F1, F2, Me):
+    """
+    Cycle totals for one side (driven or target) of the trace.
+
+    Returns:
+    - dict: D (distance), CE (cycle energy), ASC (Σ|a|), IW (inertial work)
+    """
+    terms = sample_terms(V, a, d, F0, F1, F2, Me)
+    return {
+        "D": np.cumsum(terms["D"], axis=-1)[..., -1],
+        "CE": np.cumsum(terms["CE"], axis=-1)[..., -1],
+        "ASC": np.sum(terms["ASC"], axis=-1),
+        "IW": np.sum(terms["IW"], axis=-1),
+    }
+
+
+def _pct_error(driven, target):
+    driven = np.asarray(driven, dtype=float)
+    target = np.asarray(target, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(target != 0, (driven - target) / target * 100.0, np.nan)
+
+
+def ratings(drv, tgt, SSE, n):
+    """
+    J2951 ratings from cycle totals; works on scalars or per-run arrays.
+
+    Parameters:
+    - drv, tgt: side_sums() of the driven and target traces
+    - SSE: Σ(Vd - Vt)² [m²/s²]
+    - n: sample count
+
+    Returns:
+    - dict: METRIC_KEYS + DQM (NaN where a denominator is 0)
+    """
+    ER = _pct_error(drv["CE"], tgt["CE"])
+    DR = _pct_error(drv["D"], tgt["D"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        EER = np.where((ER / 100.0) + 1.0 != 0,
+                       (1.0 - (((DR / 100.0) + 1.0) / ((ER / 100.0) + 1.0))) * 100.0,
+                       np.nan)
+    ASCR = _pct_error(drv["ASC"] * DT_S, tgt["ASC"] * DT_S)
+    IWR = _pct_error(drv["IW"], tgt["IW"])
+    RMSSE_mph = MPS_TO_MPH * np.sqrt(SSE / n)
+
+    results = {
+        "ER_pct": ER,
+        "DR_pct": DR,
+        "EER_pct": EER,
+        "ASCR_pct": ASCR,
+        "IWR_pct": IWR,
+        "RMSSE_mph": RMSSE_mph,
+    }
+
+    # DQM: mean of |rating|; NaN if any rating is NaN
+    DQM = np.abs(ER)
+    for k in METRIC_KEYS[1:]:
+        DQM = DQM + np.abs(results[k])
+    results["DQM"] = DQM / 6
+    return results
+
+
+def speed_profile(Vr_kph, Vs_kph, lengths=None):
+    """
+    Parameter-independent stage: smoothed speeds, accelerations, distances.
+
+    Parameters:
+    - Vr_kph, Vs_kph: driven / scheduled speed [kph], 1-D or (runs x samples)
+    - lengths: valid samples per row (2-D input only)
+
+    Returns:
+    - dict: Vd, Vt [m/s], ad, at [m/s²], dd, dtm [m], SSE [m²/s²], n
+    """
+    Vr_kph = np.asarray(Vr_kph, dtype=float)
+    Vs_kph = np.asarray(Vs_kph, dtype=float)
+
+    if Vr_kph.ndim == 2:
+        n = np.asarray(lengths, dtype=float) if lengths is not None \
+            else np.full(Vr_kph.shape[0], float(Vr_kph.shape[1]))
+    else:
+        n = len(Vr_kph)
+
+    Vd = smooth_speed(Vr_kph / 3.6, lengths)
+    Vt = smooth_speed(Vs_kph / 3.6, lengths)
+    ad, dd = speed_terms(Vd)
+    at, dtm = speed_terms(Vt)
+
+    return {
+        "Vd": Vd, "Vt": Vt,
+        "ad": ad, "at": at,
+        "dd": dd, "dtm": dtm,
+        "SSE": np.sum((Vd - Vt) ** 2, axis=-1),
+        "n": n,
+    }
+
+
+def score_profile(profile, ABCs_SI, Mass_kg):
+    """
+    Parameter-dependent stage: road-load / inertia forces, work and ratings.
+
+    Returns:
+    - dict: metric name → scalar (1-D profile) or per-run array
+    """
+    F0, F1, F2, Me = road_load_si(ABCs_SI, Mass_kg)
+    if profile["Vd"].ndim == 2:
+        F0, F1, F2, Me = (np.broadcast_to(c, (profile["Vd"].shape[0],))[:, None]
+                          for c in (F0, F1, F2, Me))
+
+    drv = side_sums(profile["Vd"], profile["ad"], profile["dd"], F0, F1, F2, Me)
+    tgt = side_sums(profile["Vt"], profile["at"], profile["dtm"], F0, F1, F2, Me)
+    return ratings(drv, tgt, profile["SSE"], profile["n"])
+
+
+def j2951_columns(Vr_kph, Vs_kph, ABCs_SI, Mass_kg, lengths=None):
+    """
+    Vectorized J2951 over one trace or a zero-padded batch of traces.
+
+    Parameters:
+    - Vr_kph, Vs_kph: driven / scheduled speed [kph], 1-D or (runs x samples)
+    - ABCs_SI: [F0, F1, F2] or (runs x 3)
+    - Mass_kg: ETW scalar or per run
+    - lengths: valid samples per row (2-D input only)
+
+    Returns:
+    - dict: metric name → scalar (1-D input) or per-run array
+    """
+    return score_profile(speed_profile(Vr_kph, Vs_kph, lengths), ABCs_SI, Mass_kg)
+
+
+def _reference_five_point_ma(x):
+    """기존 per-element loop 구현 (검증용)"""
+    x = np.asarray(x, dtype=float)
+    y = np.zeros_like(x)
+    for i in range(2, len(x) - 2):
+        y[i] = (x[i - 2] + x[i - 1] + x[i] + x[i + 1] + x[i + 2]) / 5.0
+    return y
+
+
+def main():
+    """벡터화 smoothing 과 기존 loop 의 bit-identical 검증"""
+    import os
+    import pandas as pd
+
+    rng = np.random.default_rng(2951)
+    cases = [rng.uniform(0.0, 130.0, n) / 3.6 for n in (0, 1, 2, 3, 4, 5, 6, 7, 50, 10_001)]
+
+    csv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+    if os.path.exists(csv_path):
+        df = pd.read_csv(csv_path)
+        cases += [df[c].to_numpy(dtype=float) / 3.6 for c in df.columns[1:]]
+
+    for x in cases:
+        expected = _reference_five_point_ma(_reference_five_point_ma(x))
+        actual = five_point_ma_with_zero_ends(five_point_ma_with_zero_ends(x))
+        if not np.array_equal(expected.view(np.int64), actual.view(np.int64)):
+            raise AssertionError(f"smoothing mismatch for n={len(x)}")
+
+    print(f"✓ five_point_ma_with_zero_ends bit-identical on {len(cases)} traces")
+
+
+if __name__ == "__main__":
+    main()
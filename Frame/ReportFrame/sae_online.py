@@ -0,0 +1,134 @@
+"""
+SAE J2951 online accumulator for live dyno feeds
+샘플이 들어올 때마다 O(1) 로 누적 — 전체 trace 를 메모리에 두지 않음
+"""
+
+from collections import deque
+
+import numpy as np
+
+from Frame.ReportFrame.sae_kernels import DT_S, LOW_SPEED_MPS, ratings, road_load_si
+
+# A sample's contribution is final once 5 later samples have arrived:
+# pass 1 looks 2 ahead, pass 2 another 2, the central difference 1 more.
+LATENCY = 5
+
+
+class _Side:
+    """Rolling filter state and running totals for one speed trace"""
+
+    def __init__(self):
+        self.x = deque(maxlen=5)     # raw speed [m/s]
+        self.y1 = deque(maxlen=5)    # first-pass MA (final values)
+        self.V = deque(maxlen=3)     # second-pass MA after truncation (final)
+        self.totals = {"D": 0.0, "CE": 0.0, "ASC": 0.0, "IW": 0.0}
+
+    def push(self, v, j):
+        """Add raw sample j; V[j - 4] becomes final"""
+        self.x.append(v)
+        if j >= 2:
+            k = j - 2
+            x = self.x
+            self.y1.append(0.0 if k < 2 else (x[0] + x[1] + x[2] + x[3] + x[4]) / 5.0)
+        if j >= 4:
+            k = j - 4
+            y = self.y1
+            self.V.append(_truncate(0.0 if k < 2 else (y[0] + y[1] + y[2] + y[3] + y[4]) / 5.0))
+
+    def tail_speeds(self, n):
+        """
+        Smoothed speeds for indices n-6 … n-1 if the run ended after n samples
+        (end rules applied); None for indices below 0.
+        """
+        y1 = list(self.y1)[-4:]               # y1[n-6 … n-3]
+        y1 = [None] * (4 - len(y1)) + y1 + [0.0, 0.0]   # + y1[n-2], y1[n-1]
+        V = list(self.V)[-2:]                 # V[n-6], V[n-5]
+        V = [None] * (2 - len(V)) + V
+
+        for k, w in ((n - 4, y1[0:5]), (n - 3, y1[1:6])):
+            if k < 0:
+                V.append(None)
+            elif k < 2:
+                V.append(0.0)
+            else:
+                V.append(_truncate((w[0] + w[1] + w[2] + w[3] + w[4]) / 5.0))
+        V += [0.0, 0.0]
+        return V
+
+
+def _truncate(v):
+    return 0.0 if v <= LOW_SPEED_MPS else v
+
+
+class OnlineJ2951:
+    """
+    Incremental SAE J2951 calculator.
+
+    push() accepts [Vr_kph, Vs_kph] pairs; results() returns the ratings as if
+    the run had ended at the last pushed sample, matching SAE_J2951.calculate
+    on the same data. Memory and time per sample are constant.
+    """
+
+    def __init__(self, ABCs_SI, Mass_kg):
+        self.F0, self.F1, self.F2, self.Me = (float(c) for c in road_load_si(ABCs_SI, Mass_kg))
+        self.n = 0
+        self.drv = _Side()
+        self.tgt = _Side()
+        self.SSE = 0.0
+
+    def push(self, samples):
+        """
+        Parameters:
+        - samples: one [Vr_kph, Vs_kph] pair or an (k x 2) array of them
+        """
+        samples = np.asarray(samples, dtype=float).reshape(-1, 2) / 3.6
+        for vr, vs in samples.tolist():
+            j = self.n
+            self.drv.push(vr, j)
+            self.tgt.push(vs, j)
+            if j > LATENCY:
+                # V[j-6], V[j-5], V[j-4] are final → commit sample j - 5
+                self.SSE += self._accumulate(j - LATENCY, self.drv.V, self.tgt.V,
+                                             self.drv.totals, self.tgt.totals)
+            self.n += 1
+
+    def _accumulate(self, c, Vd3, Vt3, drv, tgt):
+        """
+        Add sample c (≥ 1) to the side totals, given [V[c-1], V[c], V[c+1]]
+        per side (V[c+1] is None at the last sample). Returns (Vd - Vt)².
+        """
+        for V3, tot in ((Vd3, drv), (Vt3, tgt)):
+            a = 0.0 if V3[2] is None else (V3[2] - V3[0]) / (2 * DT_S)
+            d = V3[1] * DT_S
+            Frl = self.F0 + self.F1 * V3[1] + self.F2 * (V3[1] ** 2)
+            Fi = self.Me * a
+            Feng = Frl + Fi if Frl + Fi >= 0.0 else 0.0
+            tot["D"] += d
+            tot["CE"] += Feng * d
+            tot["ASC"] += abs(a)
+            tot["IW"] += max(Fi, 0.0) * d
+        return (Vd3[1] - Vt3[1]) ** 2
+
+    def results(self):
+        """
+        Current ER/DR/EER/ASCR/IWR/RMSSE/DQM, treating the samples pushed so
+        far as a complete run (the last few samples get the end rules).
+        """
+        n = self.n
+        if n < 5:
+            raise ValueError("Need ≥5 samples for the 5-point moving average.")
+
+        drv = dict(self.drv.totals)
+        tgt = dict(self.tgt.totals)
+        SSE = self.SSE
+
+        Vd = self.drv.tail_speeds(n) + [None]
+        Vt = self.tgt.tail_speeds(n) + [None]
+        # tail sample c = n-5 … n-1 ↔ list position p = c - (n-6);
+        # sample 0 never contributes (a = d = 0, V = 0)
+        for c in range(max(1, n - LATENCY), n):
+            p = c - (n - 6)
+            SSE += self._accumulate(c, Vd[p - 1:p + 2], Vt[p - 1:p + 2], drv, tgt)
+
+        res = ratings(drv, tgt, SSE, n)
+        return {k: np.float64(v) for k, v in res.items()}
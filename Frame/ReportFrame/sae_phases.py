@@ -0,0 +1,198 @@
+"""
+SAE J2951 per-phase metrics (WLTC low / medium / high / extra-high)
+한 번 계산한 per-sample 항목의 prefix sum 으로 모든 phase 를 O(1) 에 집계
+"""
+
+import numpy as np
+import pandas as pd
+
+from Frame.ReportFrame.sae_kernels import METRIC_KEYS, ratings, road_load_si, sample_terms, speed_profile
+
+# WLTC class 3 phase boundaries [s]
+WLTC_CLASS3_PHASES = [
+    ("Low", 0.0, 589.0),
+    ("Medium", 589.0, 1022.0),
+    ("High", 1022.0, 1477.0),
+    ("Extra High", 1477.0, 1800.0),
+]
+
+# Samples within EDGE of a phase boundary see the boundary through the two
+# 5-point passes (2 + 2) and the central difference (1), plus one spare.
+EDGE = 6
+
+_TERMS = ["D", "CE", "ASC", "IW"]
+
+
+def _terms(Vr_kph, Vs_kph, F0, F1, F2, Me):
+    """per-sample terms of a whole trace: {'d': {...}, 't': {...}, 'SE': ...}"""
+    prof = speed_profile(Vr_kph, Vs_kph)
+    return {
+        "d": sample_terms(prof["Vd"], prof["ad"], prof["dd"], F0, F1, F2, Me),
+        "t": sample_terms(prof["Vt"], prof["at"], prof["dtm"], F0, F1, F2, Me),
+        "SE": (prof["Vd"] - prof["Vt"]) ** 2,
+    }
+
+
+def _prefix(terms):
+    """prefix sums with a leading 0 so that sum[s:e] = P[e] - P[s]"""
+    def p(x):
+        out = np.zeros(len(x) + 1)
+        np.cumsum(x, out=out[1:])
+        return out
+    return {
+        "d": {k: p(terms["d"][k]) for k in _TERMS},
+        "t": {k: p(terms["t"][k]) for k in _TERMS},
+        "SE": p(terms["SE"]),
+    }
+
+
+def _range_sums(P, s, e):
+    return (
+        {k: P["d"][k][e] - P["d"][k][s] for k in _TERMS},
+        {k: P["t"][k][e] - P["t"][k][s] for k in _TERMS},
+        P["SE"][e] - P["SE"][s],
+    )
+
+
+def _slice_sums(terms, lo, hi):
+    return (
+        {k: terms["d"][k][lo:hi].sum() for k in _TERMS},
+        {k: terms["t"][k][lo:hi].sum() for k in _TERMS},
+        terms["SE"][lo:hi].sum(),
+    )
+
+
+def _add(a, b):
+    return ({k: a[0][k] + b[0][k] for k in _TERMS},
+            {k: a[1][k] + b[1][k] for k in _TERMS},
+            a[2] + b[2])
+
+
+def phase_indices(time, phases):
+    """
+    (name, t_start, t_end) → (name, i_start, i_stop) on the time axis.
+
+    A sample belongs to a phase when t_start ≤ t < t_end (t ≤ t_end for the
+    last phase, so the cycle's final sample is kept).
+    """
+    time = np.asarray(time, dtype=float)
+    starts = np.searchsorted(time, [p[1] for p in phases], side="left")
+    stops = np.searchsorted(time, [p[2] for p in phases], side="left")
+    stops[-1] = np.searchsorted(time, phases[-1][2], side="right")
+    return [(p[0], int(s), int(e)) for p, s, e in zip(phases, starts, stops)]
+
+
+def j2951_phases(time, Vr_kph, Vs_kph, ABCs_SI, Mass_kg,
+                 phases=WLTC_CLASS3_PHASES, boundary="continuous"):
+    """
+    J2951 metrics per cycle phase plus the whole cycle, from one pass.
+
+    Parameters:
+    - time, Vr_kph, Vs_kph: drive trace [s, kph, kph]
+    - ABCs_SI, Mass_kg: as SAE_J2951.calculate
+    - phases: list of (name, t_start, t_end) [s]; default WLTC class 3
+    - boundary: how the 5-point smoothing treats phase boundaries
+        'continuous' — smooth across boundaries (the whole-cycle signal);
+                       phase sums add up exactly to the cycle totals
+        'restart'    — score each phase as a standalone trace, with the
+                       zeroed-end rules at its boundaries (same as running
+                       SAE_J2951.calculate on the slice)
+
+    Returns:
+    - DataFrame: one row per phase and a final 'Total' row
+    """
+    if boundary not in ("continuous", "restart"):
+        raise ValueError("boundary must be 'continuous' or 'restart'.")
+
+    time = np.asarray(time, dtype=float)
+    Vr_kph = np.asarray(Vr_kph, dtype=float)
+    Vs_kph = np.asarray(Vs_kph, dtype=float)
+    n = len(time)
+    if not (len(Vr_kph) == len(Vs_kph) == n):
+        raise ValueError("time, Vr_kph, Vs_kph must have the same length.")
+    if n < 5:
+        raise ValueError("Need ≥5 samples for the 5-point moving average.")
+
+    F0, F1, F2, Me = road_load_si(ABCs_SI, Mass_kg)
+    terms = _terms(Vr_kph, Vs_kph, F0, F1, F2, Me)
+    P = _prefix(terms)
+
+    rows = []
+    spans = phase_indices(time, phases) + [("Total", 0, n)]
+    for name, s, e in spans:
+        m = e - s
+        row = {
+            "phase": name,
+            "start_s": time[s] if m else np.nan,
+            "end_s": time[e - 1] if m else np.nan,
+            "n_samples": m,
+        }
+        if m < 5:
+            row.update({k: np.nan for k in METRIC_KEYS + ["DQM"]})
+            rows.append(row)
+            continue
+
+        if boundary == "continuous" or name == "Total":
+            drv, tgt, SSE = _range_sums(P, s, e)
+        elif m <= 4 * EDGE:
+            local = _terms(Vr_kph[s:e], Vs_kph[s:e], F0, F1, F2, Me)
+            drv, tgt, SSE = _slice_sums(local, 0, m)
+        else:
+            # Interior samples are unaffected by the phase edges, so take
+            # them from the whole-trace prefix sums; recompute only the
+            # EDGE samples at each end on a standalone window.
+            w = 3 * EDGE
+            head = _terms(Vr_kph[s:s + w], Vs_kph[s:s + w], F0, F1, F2, Me)
+            tail = _terms(Vr_kph[e - w:e], Vs_kph[e - w:e], F0, F1, F2, Me)
+            sums = _range_sums(P, s + EDGE, e - EDGE)
+            sums = _add(sums, _slice_sums(head, 0, EDGE))
+            sums = _add(sums, _slice_sums(tail, w - EDGE, w))
+            drv, tgt, SSE = sums
+
+        res = ratings(drv, tgt, SSE, m)
+        row.update({k: float(v) for k, v in res.items()})
+        rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+def main():
+    """data.csv: 'restart' phase 가 slice 단독 calculate 와 같은지, 'continuous' phase 합이 전체 cycle 과 같은지 확인"""
+    import os
+
+    from Frame.ReportFrame.SAE_J2951 import SAE_J2951
+    from Frame.ReportFrame.sae_io import read_trace
+
+    t, vs, vr = read_trace(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv"))
+    abc, mass = np.array([35.5, 1.453, 0.03011]), 1726.9
+    whole = SAE_J2951.calculate(t, vr, vs, abc, mass)
+    keys = METRIC_KEYS + ["DQM"]
+
+    restart = j2951_phases(t, vr, vs, abc, mass, boundary="restart")
+    print(restart[["phase", "start_s", "end_s", "n_samples"] + keys].to_string(index=False))
+    for (name, s, e), row in zip(phase_indices(t, WLTC_CLASS3_PHASES), restart.itertuples()):
+        alone = SAE_J2951.calculate(t[s:e], vr[s:e], vs[s:e], abc, mass)
+        if not np.allclose([getattr(row, k) for k in keys], [alone[k] for k in keys],
+                           rtol=1e-9, atol=1e-12, equal_nan=True):
+            raise AssertionError(f"restart: {name} differs from calculate() on the slice")
+
+    continuous = j2951_phases(t, vr, vs, abc, mass, boundary="continuous")
+    total = continuous.iloc[-1]
+    if not np.allclose([total[k] for k in keys], [whole[k] for k in keys], rtol=1e-9, atol=1e-12):
+        raise AssertionError("continuous: Total row differs from the whole-cycle calculate()")
+    if continuous["n_samples"].iloc[:-1].sum() != len(t):
+        raise AssertionError("continuous: phases must cover every sample once")
+    # phase 별 합을 더하면 cycle 합과 같음 (prefix sum 의 구간 합)
+    P = _prefix(_terms(vr, vs, *road_load_si(abc, mass)))
+    parts = [_range_sums(P, s, e) for _, s, e in phase_indices(t, WLTC_CLASS3_PHASES)]
+    summed = parts[0]
+    for part in parts[1:]:
+        summed = _add(summed, part)
+    if not np.allclose(ratings(*summed, len(t))["DQM"], whole["DQM"], rtol=1e-9):
+        raise AssertionError("continuous: phase sums do not add up to the cycle totals")
+
+    print("✓ restart phases match per-slice calculate(); continuous phases add up to the cycle")
+
+
+if __name__ == "__main__":
+    main()
@@ -481,9 +481,123 @@ Test Information:
         pdf.savefig(fig, bbox_inches='tight')
         plt.close()
 
+        # 확장 지표 page — J2951Result 일 때만 (첫 접근 시 계산됨, cache hit 의 dict 에는 없음)
+        extended = getattr(results, 'extended', None)
+        if extended is not None:
+            fig = plt.figure(figsize=(8.5, 11))
+            fig.suptitle('Cycle Characteristics (target trace)', fontsize=16, fontweight='bold', y=0.98)
+
+            ax_ext = fig.add_subplot(2, 1, 1)
+            ax_ext.axis('off')
+            units = {'CEdist_J_per_m': 'J/m', 'IWF': '', 'RLWF': '', 'ASCtime': 'm/s²',
+                     'APC': 'W', 'APCtime': 'W/s', 'RMSSE_mps': 'm/s'}
+            ext_table = ax_ext.table(
+                cellText=[['Metric', 'Value', 'Unit']] +
+                         [[k, f"{v:.4g}", units.get(k, '')] for k, v in extended.items()],
+                cellLoc='center', loc='center', colWidths=[0.25, 0.2, 0.1])
+            ext_table.auto_set_font_size(False)
+            ext_table.set_fontsize(10)
+            ext_table.scale(1, 2.0)
+            for i in range(3):
+                ext_table[(0, i)].set_facecolor('#366092')
+                ext_table[(0, i)].set_text_props(weight='bold', color='white')
+
+            traces = results.traces
+            ax_ce = fig.add_subplot(2, 1, 2)
+            ax_ce.plot(np.arange(len(traces['CE_target_J'])) * 0.1, traces['CE_target_J'] / 1e6,
+                       color='#4169E1', label='Target')
+            ax_ce.plot(np.arange(len(traces['CE_driven_J'])) * 0.1, traces['CE_driven_J'] / 1e6,
+                       color='#DC143C', label='Driven')
+            ax_ce.set_xlabel('Time [s]')
+            ax_ce.set_ylabel('Cumulative cycle energy [MJ]')
+            ax_ce.grid(True, linestyle='--', alpha=0.4)
+            ax_ce.legend(loc='upper left')
+
+            plt.tight_layout()
+            pdf.savefig(fig, bbox_inches='tight')
+            plt.close()
+
     print(f"✓ PDF report saved: {pdf_path}")
 
 
+def create_fleet_excel_report(aggregator, excel_path: str, metrics=None):
+    """
+    Cross-run summary workbook from a FleetAggregator
+
+    Sheets: Summary (per-group distribution of every metric), Ranking and
+    Trend per metric
+    """
+    metrics = metrics or aggregator.metrics
+    header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
+
+    summary = aggregator.summary()
+    summary.columns = [f"{m} {stat}" for m, stat in summary.columns]
+    with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
+        summary.reset_index().to_excel(writer, sheet_name='Summary', index=False)
+        for m in metrics:
+            aggregator.ranking(m).reset_index().to_excel(writer, sheet_name=f'Ranking {m}'[:31], index=False)
+            aggregator.trend(m).to_excel(writer, sheet_name=f'Trend {m}'[:31], index=False)
+
+        for ws in writer.book.worksheets:
+            for cell in ws[1]:
+                cell.font = Font(bold=True, color='FFFFFF')
+                cell.fill = header_fill
+                cell.alignment = Alignment(horizontal='center', wrap_text=True)
+            for col in range(1, ws.max_column + 1):
+                ws.column_dimensions[get_column_letter(col)].width = 14
+            ws.freeze_panes = 'B2'
+
+    print(f"✓ Fleet Excel summary saved: {excel_path}")
+
+
+def create_fleet_pdf_report(aggregator, pdf_path: str, metrics=None):
+    """
+    Cross-run summary PDF: one page per metric with the per-group
+    percentile spread (p5–p95 whiskers, p25–p75 box, median) and the
+    day-by-day mean per group
+    """
+    metrics = metrics or aggregator.metrics
+    summary = aggregator.summary()
+    labels = [' / '.join(map(str, k)) if isinstance(k, tuple) else str(k) for k in summary.index]
+
+    with PdfPages(pdf_path) as pdf:
+        for m in metrics:
+            stats = summary[m]
+            fig, (ax_box, ax_trend) = plt.subplots(2, 1, figsize=(11, 8.5))
+            fig.suptitle(f'SAE J2951 Fleet Summary — {m} ({aggregator.n_runs} runs)',
+                         fontsize=16, fontweight='bold')
+
+            pos = np.arange(len(stats))
+            if {'p5', 'p25', 'p50', 'p75', 'p95'} <= set(stats.columns):
+                ax_box.vlines(pos, stats['p5'], stats['p95'], color='#555555')
+                ax_box.bar(pos, stats['p75'] - stats['p25'], bottom=stats['p25'], width=0.5,
+                           color='#4169E1', alpha=0.5)
+                ax_box.hlines(stats['p50'], pos - 0.25, pos + 0.25, color='#DC143C', linewidth=2)
+            ax_box.plot(pos, stats['mean'], 'k.', label='mean')
+            ax_box.set_xticks(pos)
+            ax_box.set_xticklabels(labels, rotation=45, ha='right', fontsize=8)
+            ax_box.set_ylabel(m)
+            ax_box.grid(True, axis='y', linestyle='--', alpha=0.4)
+
+            trend = aggregator.trend(m)
+            if not trend.empty:
+                for key, sub in trend.groupby(aggregator.by, dropna=False):
+                    key = ' / '.join(map(str, key)) if isinstance(key, tuple) else str(key)
+                    ax_trend.plot(pd.to_datetime(sub['test_date']), sub['mean'], marker='.', label=key)
+                ax_trend.set_ylabel(f'Daily mean {m}')
+                ax_trend.grid(True, linestyle='--', alpha=0.4)
+                if trend[aggregator.by].drop_duplicates().shape[0] <= 12:
+                    ax_trend.legend(loc='best', fontsize=8)
+            else:
+                ax_trend.axis('off')
+
+            plt.tight_layout()
+            pdf.savefig(fig, bbox_inches='tight')
+            plt.close(fig)
+
+    print(f"✓ Fleet PDF summary saved: {pdf_path}")
+
+
 def generate_reports(results: Dict[str, float],
                     test_info: Dict[str, str],
                     output_prefix: str = 'sae_j2951_report',
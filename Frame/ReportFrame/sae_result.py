@@ -0,0 +1,258 @@
+"""
+Lazy SAE J2951 result object
+6개 rating + DQM 은 즉시 계산, 확장 지표 (CEdist, IWF, RLWF, APC …) 와 per-sample trace 는 처음 접근할 때 계산 후 memoize
+"""
+
+from functools import cached_property
+
+import numpy as np
+
+from Frame.ReportFrame.sae_kernels import DT_S, METRIC_KEYS, MPS_TO_MPH, engine_force, ratings, road_load_si, \
+    side_sums, speed_profile
+
+# Cycle characteristics of the scheduled (target) trace, as in sae_j2951_SI
+EXTENDED_KEYS = ["CEdist_J_per_m", "IWF", "RLWF", "ASCtime", "APC", "APCtime", "RMSSE_mps"]
+
+# Per-sample traces; NaN outside the scored segments
+TRACE_KEYS = ["CE_driven_J", "CE_target_J", "D_driven_m", "D_target_m", "P_driven_W", "P_target_W",
+              "SE_cum_m2_s2", "ER_running_pct", "RMSSE_running_mph"]
+
+
+def _ratio(num, den):
+    return num / den if den != 0 else np.nan
+
+
+def _power(Feng, V):
+    """P[i] = Feng[i]·V[i] with P[0] = 0 (as in sae_j2951_SI)"""
+    P = np.zeros_like(V)
+    P[1:] = Feng[1:] * V[1:]
+    return P
+
+
+def _apc(P):
+    """Σ|dP/dt|·dt by central difference; the last sample contributes P[-1]"""
+    deriv = np.zeros_like(P)
+    if len(P) >= 3:
+        deriv[1:-1] = np.abs((P[2:] - P[:-2]) / (2 * DT_S))
+    deriv[-1] = P[-1]
+    return np.sum(deriv) * DT_S
+
+
+class J2951Result(dict):
+    """
+    The six ratings and DQM as a plain dict (plus whatever the caller adds,
+    e.g. lag_s or tolerance figures), with the extended metrics and
+    per-sample traces computed from the kept inputs on first access.
+
+    results['IWF'] and results.get('IWF') work like ordinary key lookups
+    but the value is not stored in the dict, so iteration, `in`, caching and
+    export still see only the eager values. Use results.extended /
+    results.traces for the whole set.
+    """
+
+    def __init__(self, values, Vr_kph, Vs_kph, ABCs_SI, Mass_kg, segments=None, kept=None, n_input=None):
+        super().__init__(values)
+        self._Vr = np.asarray(Vr_kph, dtype=float)
+        self._Vs = np.asarray(Vs_kph, dtype=float)
+        self._coeffs = road_load_si(ABCs_SI, Mass_kg)
+        self._segments = [(0, len(self._Vr))] if segments is None else list(segments)
+        # input index of each kept sample when gap conditioning removed some ('drop')
+        self._kept = None if kept is None or n_input is None or len(kept) == n_input else np.asarray(kept)
+        self._n_input = n_input
+
+    def __missing__(self, key):
+        if key in EXTENDED_KEYS:
+            return self.extended[key]
+        if key in TRACE_KEYS:
+            return self.traces[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        # dict.get never calls __missing__
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    @cached_property
+    def profiles(self):
+        """
+        Parameter-independent stage per segment, computed once and shared
+        with every rescore():
+        - list of (start, stop, speed_profile dict)
+        """
+        return [(s, e, speed_profile(self._Vr[s:e], self._Vs[s:e])) for s, e in self._segments]
+
+    def rescore(self, ABCs_SI, Mass_kg):
+        """
+        Same trace, new road-load coefficients / mass: only the force and
+        work stage is recomputed from the kept speed profiles.
+
+        Keys that do not depend on the parameters (lag_s, gap and tolerance
+        figures) are carried over.
+
+        Returns:
+        - J2951Result
+        """
+        coeffs = road_load_si(ABCs_SI, Mass_kg)
+        drv, tgt = {}, {}
+        SSE = 0.0
+        n = 0
+        for s, e, prof in self.profiles:
+            d = side_sums(prof["Vd"], prof["ad"], prof["dd"], *coeffs)
+            t = side_sums(prof["Vt"], prof["at"], prof["dtm"], *coeffs)
+            for k in d:
+                drv[k] = drv.get(k, 0.0) + d[k]
+                tgt[k] = tgt.get(k, 0.0) + t[k]
+            SSE += prof["SSE"]
+            n += e - s
+
+        values = {k: v[()] for k, v in ratings(drv, tgt, SSE, n).items()}
+        values.update((k, v) for k, v in self.items() if k not in values)
+        out = J2951Result(values, self._Vr, self._Vs, ABCs_SI, Mass_kg, self._segments,
+                          self._kept, self._n_input)
+        out.__dict__["profiles"] = self.profiles
+        return out
+
+    @cached_property
+    def extended(self):
+        """
+        Returns:
+        - dict: EXTENDED_KEYS → float (segments are summed like the ratings)
+        """
+        CE = D = IW = ASC = APC = SSE = 0.0
+        n = 0
+        for s, e, prof in self.profiles:
+            t = side_sums(prof["Vt"], prof["at"], prof["dtm"], *self._coeffs)
+            Feng, _ = engine_force(prof["Vt"], prof["at"], *self._coeffs)
+            CE += t["CE"]
+            D += t["D"]
+            IW += t["IW"]
+            ASC += t["ASC"] * DT_S
+            APC += _apc(_power(Feng, prof["Vt"]))
+            SSE += prof["SSE"]
+            n += e - s
+
+        IWF = _ratio(IW, CE)
+        duration = n * DT_S
+        return {
+            "CEdist_J_per_m": float(_ratio(CE, D)),
+            "IWF": float(IWF),
+            "RLWF": float(1.0 - IWF) if np.isfinite(IWF) else np.nan,
+            "ASCtime": float(_ratio(ASC, duration)),
+            "APC": float(APC),
+            "APCtime": float(_ratio(APC, duration)),
+            "RMSSE_mps": float(self["RMSSE_mph"] / MPS_TO_MPH) if n else np.nan,
+        }
+
+    @cached_property
+    def traces(self):
+        """
+        Returns:
+        - dict: TRACE_KEYS → array over the input samples; cumulative energy
+          [J], distance [m] and squared speed error [m²/s²] carry on across
+          segments, power [W] is per sample. ER / RMSSE "so far" at each
+          sample end at the final ratings. NaN where samples were excluded,
+          also where long_gaps='drop' removed them, so index × DT_S stays
+          on the input time axis.
+        """
+        out = {k: np.full(len(self._Vr), np.nan) for k in TRACE_KEYS}
+        CE_d = CE_t = D_d = D_t = SE = 0.0
+        count = np.full(len(self._Vr), np.nan)
+        k = 0
+        for s, e, prof in self.profiles:
+            err = prof["Vd"] - prof["Vt"]
+            out["SE_cum_m2_s2"][s:e] = SE + np.cumsum(err * err)
+            count[s:e] = np.arange(k + 1, k + 1 + e - s)
+            SE = out["SE_cum_m2_s2"][e - 1]
+            k += e - s
+
+            Feng_d, _ = engine_force(prof["Vd"], prof["ad"], *self._coeffs)
+            Feng_t, _ = engine_force(prof["Vt"], prof["at"], *self._coeffs)
+            out["CE_driven_J"][s:e] = CE_d + np.cumsum(Feng_d * prof["dd"])
+            out["CE_target_J"][s:e] = CE_t + np.cumsum(Feng_t * prof["dtm"])
+            out["D_driven_m"][s:e] = D_d + np.cumsum(prof["dd"])
+            out["D_target_m"][s:e] = D_t + np.cumsum(prof["dtm"])
+            out["P_driven_W"][s:e] = _power(Feng_d, prof["Vd"])
+            out["P_target_W"][s:e] = _power(Feng_t, prof["Vt"])
+            CE_d, CE_t = out["CE_driven_J"][e - 1], out["CE_target_J"][e - 1]
+            D_d, D_t = out["D_driven_m"][e - 1], out["D_target_m"][e - 1]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["ER_running_pct"] = np.where(out["CE_target_J"] != 0,
+                                             (out["CE_driven_J"] - out["CE_target_J"])
+                                             / out["CE_target_J"] * 100.0, np.nan)
+        out["RMSSE_running_mph"] = MPS_TO_MPH * np.sqrt(out["SE_cum_m2_s2"] / count)
+        if self._kept is not None:
+            for key, arr in out.items():
+                full = np.full(self._n_input, np.nan)
+                full[self._kept] = arr
+                out[key] = full
+        for arr in out.values():
+            arr.setflags(write=False)
+        return out
+
+
+def main():
+    """확장 지표가 sae_j2951_SI 내부 값과 같은지, lazy 계산 비용 확인"""
+    import os
+    import time
+
+    from Frame.ReportFrame.SAE_J2951 import SAE_J2951
+    from Frame.ReportFrame.sae_io import read_trace
+
+    t, vs, vr = read_trace(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv"))
+    abc, mass = np.array([35.5, 1.453, 0.03011]), 1726.9
+
+    t0 = time.perf_counter()
+    res = SAE_J2951.calculate(t, vr, vs, abc, mass)
+    t1 = time.perf_counter()
+    ext = res.extended
+    t2 = time.perf_counter()
+    res.traces
+    t3 = time.perf_counter()
+
+    # sae_j2951_SI 의 target 쪽 계산을 그대로 재현
+    F0, F1, F2, Me = road_load_si(abc, mass)
+    prof = speed_profile(vr, vs)
+    Vt, at, dtm = prof["Vt"], prof["at"], prof["dtm"]
+    Fit = Me * at
+    Frlt = F0 + F1 * Vt + F2 * (Vt ** 2)
+    Fengt = np.where(Frlt + Fit >= 0.0, Frlt + Fit, 0.0)
+    CEt = np.cumsum(Fengt * dtm)[-1]
+    IWt = np.sum(np.maximum(Fit, 0.0) * dtm)
+    expected = {"CEdist_J_per_m": CEt / np.cumsum(dtm)[-1], "IWF": IWt / CEt,
+                "APC": _apc(_power(Fengt, Vt))}
+    for k, v in expected.items():
+        if ext[k] != v:
+            raise AssertionError(f"{k}: {ext[k]} != {v}")
+    if res["IWF"] != ext["IWF"] or res.get("IWF") != ext["IWF"] or "IWF" in res:
+        raise AssertionError("extended keys must resolve lazily, outside the dict")
+    if res.get("no_such_key", -1.0) != -1.0 or res.get("CE_target_J") is not res.traces["CE_target_J"]:
+        raise AssertionError("get() must fall back to the default and see the lazy keys")
+    if res.traces["CE_target_J"][-1] != CEt:
+        raise AssertionError("cumulative target energy must end at CEt")
+    for trace, key in (("ER_running_pct", "ER_pct"), ("RMSSE_running_mph", "RMSSE_mph")):
+        if not np.isclose(res.traces[trace][-1], res[key], rtol=1e-12):
+            raise AssertionError(f"{trace} must end at {key}")
+
+    # 파라미터만 바꾼 rescore 는 처음부터 다시 계산한 것과 같아야 함
+    abc2, mass2 = np.array([40.0, 1.2, 0.035]), 1850.0
+    t4 = time.perf_counter()
+    again = res.rescore(abc2, mass2)
+    t5 = time.perf_counter()
+    fresh = SAE_J2951.calculate(t, vr, vs, abc2, mass2)
+    if any(again[k] != fresh[k] for k in METRIC_KEYS + ["DQM"]):
+        raise AssertionError("rescore must match a fresh calculate")
+    if again.extended != fresh.extended:
+        raise AssertionError("rescored extended metrics must match a fresh calculate")
+
+    for k in EXTENDED_KEYS:
+        print(f"  {k:<15} {ext[k]:.6g}")
+    print(f"✓ rescore with new ABC / mass in {1e3 * (t5 - t4):.2f} ms")
+    print(f"✓ ratings {1e3 * (t1 - t0):.1f} ms, extended {1e3 * (t2 - t1):.1f} ms, "
+          f"traces {1e3 * (t3 - t2):.1f} ms (on demand only)")
+
+
+if __name__ == "__main__":
+    main()
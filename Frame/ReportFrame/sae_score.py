@@ -0,0 +1,99 @@
+"""
+Score one drive log into a flat result row (the batch / CLI row format)
+j2951 score 의 빠른 시작을 위해 numpy 와 kernel / condition 모듈만 import — pandas, sqlite, results store 없음
+"""
+
+import math
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+
+from Frame.ReportFrame.sae_align import align_trace
+from Frame.ReportFrame.sae_condition import j2951_conditioned, summary_values as condition_summary
+from Frame.ReportFrame.sae_io import read_trace
+from Frame.ReportFrame.sae_kernels import METRIC_KEYS
+from Frame.ReportFrame.sae_reference import j2951_reference
+from Frame.ReportFrame.sae_resample import to_j2951_grid
+
+
+def dqm(out: Dict[str, float]) -> float:
+    """DQM: mean |rating| over the six J2951 metrics (NaN if any is missing)"""
+    keys = ["ER_pct", "DR_pct", "EER_pct", "ASCR_pct", "IWR_pct", "RMSSE_mph"]
+    values = [abs(out[k]) for k in keys if k in out and out[k] is not None and not math.isnan(out[k])]
+    if len(values) == 6:
+        return sum(values) / 6
+    return np.nan
+
+
+RESULT_FIELDS = ["file", "vehicle", "test_date",
+                 "n_samples", "resampled", "gaps", "duplicates", "nonfinite", "lag_s",
+                 "gaps_interpolated", "gaps_masked", "masked_s",
+                 "ER_pct", "DR_pct", "EER_pct", "ASCR_pct", "IWR_pct", "RMSSE_mph",
+                 "DQM", "error"]
+
+
+def score_file(path: str, ABCs_SI: np.ndarray, Mass_kg: float,
+               cache_dir: Optional[str] = None, align: bool = False) -> Dict[str, object]:
+    """
+    One CSV → one result row. Failures are returned in 'error', never raised.
+    With cache_dir, an unchanged file scored with the same parameters is
+    answered from the result cache without parsing the CSV. With align,
+    Vroll is shifted by the estimated lag first and 'lag_s' is reported.
+    NaN runs are interpolated or split off (sae_condition) rather than
+    turning every rating into NaN; what was done is reported per file.
+    The test date is the file's modification date.
+    """
+    row: Dict[str, object] = {"file": path}
+    try:
+        row["test_date"] = datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d")
+
+        def compute():
+            time_s, Vs_kph, Vr_kph = read_trace(path)
+            time_s, Vs_kph, Vr_kph, report = to_j2951_grid(time_s, Vs_kph, Vr_kph)
+            if len(time_s) < 5:
+                raise ValueError("Need ≥5 samples for the 5-point moving average.")
+            lag = None
+            if align:
+                Vr_kph, lag = align_trace(Vr_kph, Vs_kph)
+            gap_report = None
+            if np.isfinite(Vr_kph).all() and np.isfinite(Vs_kph).all():
+                # Runs of the same cycle share the target side (reference-cycle cache, per worker)
+                out = j2951_reference(Vr_kph, Vs_kph, ABCs_SI, Mass_kg)
+            else:
+                out, gap_report = j2951_conditioned(Vr_kph, Vs_kph, ABCs_SI, Mass_kg)
+            values = {k: float(out[k]) for k in METRIC_KEYS}
+            values["n_samples"] = len(time_s)
+            values["resampled"] = report is not None
+            values["gaps"] = report["gaps"] if report else 0
+            values["duplicates"] = report["duplicates"] if report else 0
+            values["nonfinite"] = report["nonfinite"] if report else 0
+            values["DQM"] = float(dqm(out))
+            if lag is not None:
+                values["lag_s"] = lag["lag_s"]
+            if gap_report is not None:
+                values.update(condition_summary(gap_report))
+            return values
+
+        if cache_dir:
+            from Frame.ReportFrame.sae_cache import ResultCache
+
+            values, _ = ResultCache(cache_dir).get_or_compute(
+                path, ABCs_SI, Mass_kg, compute,
+                calculator="SAE_Calculate+align" if align else "SAE_Calculate")
+        else:
+            values = compute()
+        row.update(values)
+        row["n_samples"] = int(row["n_samples"])
+        row["resampled"] = bool(row["resampled"])
+        row["gaps"] = int(row["gaps"])
+        row["duplicates"] = int(row["duplicates"])
+        row["nonfinite"] = int(row.get("nonfinite", 0))
+        for k in ("gaps_interpolated", "gaps_masked"):
+            if k in row:
+                row[k] = int(row[k])
+        row["error"] = ""
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
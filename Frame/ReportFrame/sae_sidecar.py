@@ -0,0 +1,202 @@
+"""
+Columnar binary sidecar cache for imported drive logs (CSV / XLSX)
+처음 열 때 컬럼별 .npy 와 원본의 size/mtime/hash 를 저장하고, 이후에는 text 를 다시 파싱하지 않고 memory-map 으로 읽음
+cache 디렉터리가 max_bytes 를 넘으면 가장 오래 쓰지 않은 sidecar 부터 삭제 (LRU, sae_cache.ResultCache 와 같은 방식)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from Frame.ReportFrame.sae_cache import file_digest
+from Frame.ReportFrame.sae_io import read_trace
+
+DEFAULT_SIDECAR_DIR = os.path.join(os.path.expanduser("~"), ".cache", "mechlab", "sidecar")
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+SIDECAR_VERSION = 1
+
+_META = "meta.json"
+
+
+def sidecar_path(source, key="", directory=DEFAULT_SIDECAR_DIR):
+    """
+    Sidecar directory of a source file.
+
+    Parameters:
+    - key: name of the loader, so different readers of one file don't collide
+    - directory: cache directory; None puts the sidecar next to the source
+      as '<source>.<key>.cols'
+    """
+    source = os.path.abspath(source)
+    name = f"{os.path.basename(source)}.{key or 'data'}.cols"
+    if directory is None:
+        return os.path.join(os.path.dirname(source), name)
+    tag = hashlib.sha1(source.encode()).hexdigest()[:16]
+    return os.path.join(directory, f"{tag}_{name}")
+
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(path, _META)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_fresh(meta, source, st):
+    """
+    Same size and mtime → fresh. Same size, new mtime → compare content
+    hashes (a touched but unchanged file keeps its sidecar).
+    """
+    if meta is None or meta.get("version") != SIDECAR_VERSION or meta.get("size") != st.st_size:
+        return False
+    if meta.get("mtime_ns") == st.st_mtime_ns:
+        return True
+    return meta.get("blake2b") == file_digest(source)
+
+
+def _as_columns(data):
+    """DataFrame or {name: array} → {str name: 1-D ndarray} (no object dtype)"""
+    items = data.items() if isinstance(data, dict) else ((c, data[c].to_numpy()) for c in data.columns)
+    columns = {}
+    for name, values in items:
+        arr = np.asarray(values)
+        if arr.dtype == object:
+            arr = arr.astype(str)
+        columns[str(name)] = arr
+    return columns
+
+
+def _write(path, source, st, columns):
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+    try:
+        names = list(columns)
+        for i, name in enumerate(names):
+            np.save(os.path.join(tmp, f"col_{i:03d}.npy"), columns[name], allow_pickle=False)
+        meta = {
+            "version": SIDECAR_VERSION,
+            "source": os.path.abspath(source),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "blake2b": file_digest(source),
+            "columns": names,
+        }
+        with open(os.path.join(tmp, _META), "w") as f:
+            json.dump(meta, f, indent=1)
+        shutil.rmtree(path, ignore_errors=True)
+        os.rename(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def _size(path):
+    total = 0
+    with os.scandir(path) as it:
+        for e in it:
+            try:
+                total += e.stat().st_size
+            except OSError:
+                pass
+    return total
+
+
+def evict(directory=DEFAULT_SIDECAR_DIR, max_bytes=DEFAULT_MAX_BYTES, keep=None):
+    """
+    Drop least recently used sidecars until the directory fits max_bytes.
+    Recency is the mtime of a sidecar's meta.json, refreshed on every hit;
+    keep (a sidecar path) is never removed.
+    """
+    entries = []
+    total = 0
+    try:
+        it = os.scandir(directory)
+    except OSError:
+        return
+    with it:
+        for e in it:
+            if not e.name.endswith(".cols") or not e.is_dir():
+                continue
+            try:
+                used = os.stat(os.path.join(e.path, _META)).st_mtime_ns
+                size = _size(e.path)
+            except OSError:
+                continue
+            entries.append((used, size, e.path))
+            total += size
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        if keep is not None and os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+
+def _open(path, meta, mmap):
+    return {name: np.load(os.path.join(path, f"col_{i:03d}.npy"),
+                          mmap_mode="r" if mmap else None, allow_pickle=False)
+            for i, name in enumerate(meta["columns"])}
+
+
+def load_columns(source, loader, key="", directory=DEFAULT_SIDECAR_DIR, mmap=True,
+                 max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Columns of a source file, from its sidecar when it is still valid.
+
+    Parameters:
+    - loader: source path → DataFrame or {name: array}; called only when the
+      sidecar is missing or stale (source size / mtime / content changed)
+    - key, directory: see sidecar_path
+    - mmap: memory-map the arrays (read-only) instead of reading them in
+    - max_bytes: size cap of the cache directory; least recently used
+      sidecars are evicted after a write (not applied with directory=None)
+
+    Returns:
+    - (dict {name: ndarray}, hit)
+    """
+    st = os.stat(source)
+    path = sidecar_path(source, key, directory)
+    meta = _read_meta(path)
+    if _is_fresh(meta, source, st):
+        try:
+            columns = _open(path, meta, mmap)
+            if meta["mtime_ns"] != st.st_mtime_ns:
+                meta["mtime_ns"] = st.st_mtime_ns
+                with open(os.path.join(path, _META), "w") as f:
+                    json.dump(meta, f, indent=1)
+            else:
+                os.utime(os.path.join(path, _META))     # LRU recency
+            return columns, True
+        except (OSError, ValueError, KeyError):
+            pass                                # damaged sidecar → rebuild
+
+    columns = _as_columns(loader(source))
+    try:
+        _write(path, source, st, columns)
+    except OSError:
+        return columns, False                   # read-only location: no sidecar
+    if directory is not None:
+        evict(directory, max_bytes, keep=path)
+    return _open(path, _read_meta(path), mmap), False
+
+
+def read_trace_columns(source, directory=DEFAULT_SIDECAR_DIR):
+    """
+    sae_io.read_trace through the sidecar cache.
+
+    Returns:
+    - (time_s, Vs_kph, Vr_kph) float64 arrays (read-only memory maps on a hit)
+    """
+    def load(path):
+        return dict(zip(("time", "vsched", "vroll"), read_trace(path)))
+
+    columns, _ = load_columns(source, load, key="trace", directory=directory)
+    return columns["time"], columns["vsched"], columns["vroll"]
@@ -0,0 +1,230 @@
+"""
+SQLite results history for SAE J2951 runs
+WAL mode + typed 컬럼 + vehicle / date / test ID index — batch 는 한 transaction 으로 bulk insert, trend 조회 API 제공
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from Frame.ReportFrame.sae_kernels import CALCULATOR_VERSION, METRIC_KEYS
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".local", "share", "mechlab", "j2951_results.sqlite")
+
+# column → SQLite type; every record is stored with exactly these columns
+COLUMNS = {
+    "created": "TEXT NOT NULL",
+    "test_date": "TEXT NOT NULL",           # YYYY-MM-DD
+    "vehicle": "TEXT",
+    "test_id": "TEXT",
+    "source_file": "TEXT",
+    "source_hash": "TEXT",
+    "calculator": "TEXT",
+    "F0_N": "REAL",
+    "F1_N_per_kph": "REAL",
+    "F2_N_per_kph2": "REAL",
+    "mass_kg": "REAL",
+    "n_samples": "INTEGER",
+    **{k: "REAL" for k in METRIC_KEYS},
+    "DQM": "REAL",
+    "lag_s": "REAL",
+    "NEC": "REAL",
+    "FC": "REAL",
+}
+
+TREND_METRICS = METRIC_KEYS + ["DQM", "lag_s"]
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, "
+    + ", ".join(f"{name} {kind}" for name, kind in COLUMNS.items()) + ")",
+    "CREATE INDEX IF NOT EXISTS runs_vehicle_date ON runs (vehicle, test_date)",
+    "CREATE INDEX IF NOT EXISTS runs_date ON runs (test_date)",
+    "CREATE INDEX IF NOT EXISTS runs_test_id ON runs (test_id)",
+    "CREATE INDEX IF NOT EXISTS runs_source_hash ON runs (source_hash)",
+]
+
+_INSERT = (f"INSERT INTO runs ({', '.join(COLUMNS)}) "
+           f"VALUES ({', '.join(':' + c for c in COLUMNS)})")
+
+
+def _float(value):
+    """float, or None for missing / NaN (stored as NULL)"""
+    if value is None or value == "":
+        return None
+    value = float(value)
+    return None if value != value else value
+
+
+def make_record(results, ABCs_SI, Mass_kg, vehicle=None, test_id=None, test_date=None,
+                source_file=None, source_hash=None, calculator="SAE_J2951", NEC=None, FC=None):
+    """
+    One results-store row from a J2951 results dict (or a batch result row).
+
+    Parameters:
+    - results: ER_pct … RMSSE_mph, DQM; optional n_samples, lag_s
+    - test_date: date / datetime / 'YYYY-MM-DD' (default: today)
+
+    Returns:
+    - dict with every COLUMNS key
+    """
+    if test_date is None:
+        test_date = datetime.now()
+    if not isinstance(test_date, str):
+        test_date = test_date.strftime("%Y-%m-%d")
+    record = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "test_date": test_date,
+        "vehicle": vehicle,
+        "test_id": test_id,
+        "source_file": os.path.abspath(source_file) if source_file else None,
+        "source_hash": source_hash,
+        "calculator": f"{calculator}/{CALCULATOR_VERSION}",
+        "F0_N": _float(ABCs_SI[0]),
+        "F1_N_per_kph": _float(ABCs_SI[1]),
+        "F2_N_per_kph2": _float(ABCs_SI[2]),
+        "mass_kg": _float(Mass_kg),
+        "n_samples": int(results["n_samples"]) if results.get("n_samples") is not None else None,
+        "NEC": _float(NEC),
+        "FC": _float(FC),
+    }
+    for k in TREND_METRICS:
+        record[k] = _float(results.get(k))
+    return record
+
+
+class ResultStore:
+    """
+    SQLite-backed history of scored runs.
+
+    WAL journal: readers (trend reports, the GUI) never block the writer,
+    and concurrent writers wait up to `timeout` s for the lock instead of
+    failing. insert_many() writes a whole batch in one transaction.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, timeout=30.0):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=timeout)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            for statement in _SCHEMA:
+                self.conn.execute(statement)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def insert(self, record):
+        """Returns: row id"""
+        with self.conn:
+            return self.conn.execute(_INSERT, record).lastrowid
+
+    def insert_many(self, records):
+        """Bulk insert in a single transaction; returns the number of rows"""
+        records = list(records)
+        with self.conn:
+            self.conn.executemany(_INSERT, records)
+        return len(records)
+
+    def query(self, vehicle=None, test_id=None, since=None, until=None,
+              source_hash=None, after_id=None, columns=None, limit=None):
+        """
+        Runs matching every given filter, oldest test date first.
+
+        Parameters:
+        - since / until: inclusive 'YYYY-MM-DD' bounds on test_date
+        - after_id: only rows inserted after this row id (incremental readers)
+        - columns: subset of COLUMNS (default: all, plus id)
+
+        Returns:
+        - DataFrame
+        """
+        where, params = self._filters(vehicle=vehicle, test_id=test_id, since=since,
+                                      until=until, source_hash=source_hash, after_id=after_id)
+        cols = ["id"] + [c for c in (columns or COLUMNS) if c in COLUMNS]
+        sql = f"SELECT {', '.join(cols)} FROM runs{where} ORDER BY test_date, id"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def trend(self, metric="DQM", by="vehicle", since=None, until=None, vehicle=None):
+        """
+        Per-day aggregate of one metric (computed in SQLite, so only the
+        summary rows are loaded).
+
+        Returns:
+        - DataFrame: <by>, test_date, runs, mean, min, max
+        """
+        if metric not in TREND_METRICS:
+            raise ValueError(f"metric must be one of {TREND_METRICS}")
+        if by not in ("vehicle", "test_id", "calculator"):
+            raise ValueError("by must be 'vehicle', 'test_id' or 'calculator'.")
+        where, params = self._filters(vehicle=vehicle, since=since, until=until)
+        sql = (f"SELECT {by}, test_date, COUNT({metric}) AS runs, AVG({metric}) AS mean, "
+               f"MIN({metric}) AS min, MAX({metric}) AS max FROM runs{where} "
+               f"GROUP BY {by}, test_date ORDER BY {by}, test_date")
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    @staticmethod
+    def _filters(vehicle=None, test_id=None, since=None, until=None, source_hash=None, after_id=None):
+        clauses, params = [], []
+        for column, op, value in (("vehicle", "=", vehicle), ("test_id", "=", test_id),
+                                  ("test_date", ">=", since), ("test_date", "<=", until),
+                                  ("source_hash", "=", source_hash), ("id", ">", after_id)):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def main():
+    """임시 DB 에 bulk insert 후 index 사용 여부와 trend 조회 확인"""
+    import tempfile
+    import time
+
+    import numpy as np
+
+    rng = np.random.default_rng(19)
+    abc, mass = [35.5, 1.453, 0.03011], 1726.9
+    with tempfile.TemporaryDirectory() as tmp, ResultStore(os.path.join(tmp, "runs.sqlite")) as store:
+        records = []
+        for i in range(20_000):
+            res = {k: rng.normal(0, 2) for k in METRIC_KEYS}
+            res["DQM"] = sum(abs(res[k]) for k in METRIC_KEYS) / 6
+            res["n_samples"] = 17856
+            records.append(make_record(res, abc, mass, vehicle=f"V{i % 7}", test_id=f"run-{i}",
+                                       test_date=f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}"))
+        t0 = time.perf_counter()
+        store.insert_many(records)
+        t1 = time.perf_counter()
+
+        plan = store.conn.execute("EXPLAIN QUERY PLAN SELECT * FROM runs WHERE vehicle = ? "
+                                  "AND test_date >= ?", ("V3", "2025-06-01")).fetchall()
+        if not any("runs_vehicle_date" in str(row) for row in plan):
+            raise AssertionError(f"vehicle/date query does not use the index: {plan}")
+
+        runs = store.query(vehicle="V3", since="2025-06-01", until="2025-06-30")
+        trend = store.trend("DQM", since="2025-06-01", until="2025-06-30")
+        t2 = time.perf_counter()
+        if store.conn.execute("PRAGMA journal_mode").fetchone()[0] != "wal":
+            raise AssertionError("store must run in WAL mode")
+
+        print(trend.head(10).to_string(index=False))
+        print(f"✓ {store.count()} rows inserted in {t1 - t0:.2f} s; "
+              f"{len(runs)} V3 runs in June, trend in {1e3 * (t2 - t1):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
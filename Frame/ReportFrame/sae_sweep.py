@@ -0,0 +1,108 @@
+"""
+SAE J2951 road-load / mass parameter sweep
+속도 관련 배열은 한 번만 계산하고 (F0, F1, F2, mass) grid 전체에 broadcast
+"""
+
+import numpy as np
+
+from Frame.ReportFrame.sae_kernels import METRIC_KEYS, ratings, road_load_si, speed_profile
+
+SWEEP_METRICS = METRIC_KEYS + ["DQM"]
+
+
+def _cycle_energy(V, a, d, P, block_elems):
+    """
+    Σ d · max(F0 + F1·V + F2·V² + Me·a, 0) for every parameter row of P.
+
+    Samples whose engine force has the same sign for every grid point are
+    folded into four moments (Σd, ΣdV, ΣdV², Σda). Only the samples that
+    switch sign somewhere inside the grid are evaluated per grid point.
+
+    Parameters:
+    - V, a, d: smoothed speed, acceleration, step distance (1-D)
+    - P: (G x 4) grid of [F0, F1, F2, Me] in SI
+    - block_elems: max elements of one (grid block x samples) temporary
+
+    Returns:
+    - CE: (G,) cycle energy [J]
+    """
+    moving = d != 0.0
+    V, a, d = V[moving], a[moving], d[moving]
+    basis = np.stack([np.ones_like(V), V, V ** 2, a])  # (4 x m)
+
+    # Per-sample force bounds over the grid box (V ≥ 0 so only Me·a flips)
+    lo, hi = P.min(axis=0), P.max(axis=0)
+    Frl_lo = lo[0] + lo[1] * V + lo[2] * V ** 2
+    Frl_hi = hi[0] + hi[1] * V + hi[2] * V ** 2
+    F_lo = Frl_lo + np.where(a >= 0.0, lo[3], hi[3]) * a
+    F_hi = Frl_hi + np.where(a >= 0.0, hi[3], lo[3]) * a
+
+    always = F_lo >= 0.0
+    mixed = ~always & (F_hi >= 0.0)
+
+    CE = P @ (basis[:, always] @ d[always])
+
+    if mixed.any():
+        B = basis[:, mixed]
+        dm = d[mixed]
+        step = max(1, block_elems // B.shape[1])
+        for g in range(0, len(P), step):
+            F = P[g:g + step] @ B
+            np.maximum(F, 0.0, out=F)
+            CE[g:g + step] += F @ dm
+    return CE
+
+
+def j2951_sweep(time, Vr_kph, Vs_kph, F0_N, F1_N_per_kph, F2_N_per_kph2, Mass_kg,
+                block_elems=1 << 22):
+    """
+    J2951 metrics over a full (F0, F1, F2, mass) grid from one trace.
+
+    Parameters:
+    - time, Vr_kph, Vs_kph: one drive trace (time is not used, dt = 0.1 s)
+    - F0_N, F1_N_per_kph, F2_N_per_kph2, Mass_kg: 1-D value lists per axis
+    - block_elems: memory cap for the per-grid-point stage (float64 elements)
+
+    Returns:
+    - ndarray: shape (len F0, len F1, len F2, len Mass, len(SWEEP_METRICS))
+    """
+    Vr_kph = np.asarray(Vr_kph, dtype=float)
+    Vs_kph = np.asarray(Vs_kph, dtype=float)
+    if not (len(time) == len(Vr_kph) == len(Vs_kph)):
+        raise ValueError("time, Vr_kph, Vs_kph must have the same length.")
+    if len(Vr_kph) < 5:
+        raise ValueError("Need ≥5 samples for the 5-point moving average.")
+
+    axes = [np.atleast_1d(np.asarray(v, dtype=float))
+            for v in (F0_N, F1_N_per_kph, F2_N_per_kph2, Mass_kg)]
+    if np.any(axes[3] <= 0):
+        raise ValueError("Mass_kg must be positive.")
+    shape = tuple(len(v) for v in axes)
+
+    grid = np.meshgrid(*axes, indexing="ij")
+    ABCs = np.stack([g.ravel() for g in grid[:3]], axis=-1)
+    F0, F1, F2, Me = road_load_si(ABCs, grid[3].ravel())
+    P = np.stack([F0, F1, F2, Me], axis=-1)
+
+    prof = speed_profile(Vr_kph, Vs_kph)
+    Vd, Vt, ad, at, dd, dtm = (prof[k] for k in ("Vd", "Vt", "ad", "at", "dd", "dtm"))
+
+    # Parameter-independent totals; inertial work scales linearly with Me
+    drv = {
+        "D": np.sum(dd),
+        "ASC": np.sum(np.abs(ad)),
+        "IW": Me * np.sum(np.maximum(ad, 0.0) * dd),
+        "CE": _cycle_energy(Vd, ad, dd, P, block_elems),
+    }
+    tgt = {
+        "D": np.sum(dtm),
+        "ASC": np.sum(np.abs(at)),
+        "IW": Me * np.sum(np.maximum(at, 0.0) * dtm),
+        "CE": _cycle_energy(Vt, at, dtm, P, block_elems),
+    }
+
+    res = ratings(drv, tgt, prof["SSE"], prof["n"])
+    out = np.empty((len(P), len(SWEEP_METRICS)))
+    for j, k in enumerate(SWEEP_METRICS):
+        out[:, j] = res[k]
+    return out.reshape(shape + (len(SWEEP_METRICS),))
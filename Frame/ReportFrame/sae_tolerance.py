@@ -0,0 +1,166 @@
+"""
+Speed / time tolerance band check (e.g. ±2 km/h within ±1 s)
+sliding-window min/max (van Herk / Gil-Werman, O(n)) 로 허용 band 를 만들고 이탈 구간을 집계
+"""
+
+import numpy as np
+import pandas as pd
+
+from Frame.ReportFrame.sae_kernels import DT_S, runs
+
+DEFAULT_SPEED_TOL_KPH = 2.0
+DEFAULT_TIME_TOL_S = 1.0
+
+INTERVAL_COLUMNS = ["start_s", "end_s", "duration_s", "side", "max_excess_kph"]
+
+
+def sliding_max(x, half_width):
+    """
+    Centred moving maximum, out[i] = max(x[i-h … i+h]) (window clipped at
+    the ends), with 3 comparisons per sample whatever the window size.
+    """
+    x = np.asarray(x, dtype=float)
+    h = int(half_width)
+    n = len(x)
+    if h <= 0 or n == 0:
+        return x.copy()
+    k = 2 * h + 1
+    nb = -(-(n + 2 * h) // k)
+    padded = np.full(nb * k, -np.inf)
+    padded[h:h + n] = x
+
+    blocks = padded.reshape(nb, k)
+    prefix = np.maximum.accumulate(blocks, axis=1).ravel()
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    # window [i, i + k) of the padded array ↔ centred window of sample i
+    return np.maximum(suffix[:n], prefix[k - 1:k - 1 + n])
+
+
+def sliding_min(x, half_width):
+    """Centred moving minimum (see sliding_max)"""
+    return -sliding_max(-np.asarray(x, dtype=float), half_width)
+
+
+def tolerance_envelope(Vs_kph, speed_tol_kph=DEFAULT_SPEED_TOL_KPH,
+                       time_tol_s=DEFAULT_TIME_TOL_S, dt=DT_S):
+    """
+    Band around the scheduled speed: the highest schedule value within
+    ±time_tol_s plus speed_tol_kph, and the lowest minus it.
+
+    Returns:
+    - (lower_kph, upper_kph)
+    """
+    h = int(round(time_tol_s / dt))
+    Vs_kph = np.asarray(Vs_kph, dtype=float)
+    upper = sliding_max(Vs_kph, h) + speed_tol_kph
+    lower = sliding_min(Vs_kph, h) - speed_tol_kph
+    return lower, upper
+
+
+def tolerance_check(time, Vr_kph, Vs_kph, speed_tol_kph=DEFAULT_SPEED_TOL_KPH,
+                    time_tol_s=DEFAULT_TIME_TOL_S, dt=DT_S, min_duration_s=0.0):
+    """
+    Driven trace against the speed/time tolerance band.
+
+    Parameters:
+    - time, Vr_kph, Vs_kph: drive trace on the 10 Hz grid [s, kph, kph]
+    - speed_tol_kph, time_tol_s: band half-widths
+    - min_duration_s: shorter violations are ignored
+
+    Returns:
+    - dict:
+        'intervals'  DataFrame (start_s, end_s, duration_s, side, max_excess_kph)
+        'count'      number of violations
+        'total_s'    summed duration [s]
+        'longest_s'  longest violation [s]
+        'above_s', 'below_s'  time above / below the band [s]
+        'lower', 'upper'      envelope arrays [kph]
+    """
+    time = np.asarray(time, dtype=float)
+    Vr_kph = np.asarray(Vr_kph, dtype=float)
+    Vs_kph = np.asarray(Vs_kph, dtype=float)
+    if not (len(time) == len(Vr_kph) == len(Vs_kph)):
+        raise ValueError("time, Vr_kph, Vs_kph must have the same length.")
+
+    lower, upper = tolerance_envelope(Vs_kph, speed_tol_kph, time_tol_s, dt)
+    above = Vr_kph > upper          # NaN compares False: gaps are not violations
+    below = Vr_kph < lower
+    excess = np.where(above, Vr_kph - upper, np.where(below, lower - Vr_kph, 0.0))
+
+    starts, stops = runs(above | below)
+    durations = (stops - starts) * dt
+    keep = durations >= min_duration_s
+    starts, stops, durations = starts[keep], stops[keep], durations[keep]
+
+    # reduceat over [start, stop) pairs; a sentinel keeps stop = n in range
+    bounds = np.empty(2 * len(starts), dtype=np.intp)
+    bounds[0::2] = starts
+    bounds[1::2] = stops
+
+    def per_interval(ufunc, x):
+        if not len(starts):
+            return np.zeros(0, dtype=x.dtype)
+        return ufunc.reduceat(np.append(x, x[:1]), bounds)[0::2]
+
+    peak = per_interval(np.maximum, excess)
+    n_above = per_interval(np.add, above.astype(np.int64))
+    n_below = per_interval(np.add, below.astype(np.int64))
+    side = np.where(n_below == 0, "above", np.where(n_above == 0, "below", "both"))
+
+    intervals = pd.DataFrame({
+        "start_s": time[starts],
+        "end_s": time[stops - 1],
+        "duration_s": durations,
+        "side": side,
+        "max_excess_kph": peak,
+    }, columns=INTERVAL_COLUMNS)
+
+    return {
+        "intervals": intervals,
+        "count": int(len(starts)),
+        "total_s": float(durations.sum()),
+        "longest_s": float(durations.max()) if len(durations) else 0.0,
+        "above_s": float(n_above.sum() * dt),
+        "below_s": float(n_below.sum() * dt),
+        "lower": lower,
+        "upper": upper,
+    }
+
+
+def summary_values(check):
+    """Scalar part of tolerance_check() for results dicts / tables"""
+    return {
+        "tol_violations": check["count"],
+        "tol_total_s": check["total_s"],
+        "tol_longest_s": check["longest_s"],
+    }
+
+
+def main():
+    """O(n) sliding min/max 를 단순 loop 와 비교하고 data.csv 결과 출력"""
+    import os
+    import time as timer
+
+    from Frame.ReportFrame.sae_io import read_trace
+
+    rng = np.random.default_rng(15)
+    for n, h in ((1, 3), (7, 3), (50, 0), (101, 10), (1000, 25)):
+        x = rng.normal(size=n)
+        ref = np.array([x[max(0, i - h):i + h + 1].max() for i in range(n)])
+        if not np.array_equal(sliding_max(x, h), ref):
+            raise AssertionError(f"sliding_max mismatch n={n} h={h}")
+        ref = np.array([x[max(0, i - h):i + h + 1].min() for i in range(n)])
+        if not np.array_equal(sliding_min(x, h), ref):
+            raise AssertionError(f"sliding_min mismatch n={n} h={h}")
+
+    t, vs, vr = read_trace(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv"))
+    t0 = timer.perf_counter()
+    check = tolerance_check(t, vr, vs)
+    dt = timer.perf_counter() - t0
+    print(check["intervals"].to_string(index=False))
+    print(f"✓ {check['count']} violations, {check['total_s']:.1f} s total, "
+          f"longest {check['longest_s']:.1f} s ({dt * 1e3:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
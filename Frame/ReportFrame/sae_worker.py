@@ -0,0 +1,328 @@
+"""
+Background analysis worker for the report GUI
+파일 읽기 + J2951 계산을 worker thread 에서 순서대로 처리 — 진행률 callback, 취소, 여러 파일 대기열 지원 (wx 의존 없음)
+"""
+
+import itertools
+import queue
+import threading
+
+import numpy as np
+
+from Frame.ReportFrame.SAE_J2951 import SAE_J2951
+from Frame.ReportFrame.sae_decimate import LODPyramid
+from Frame.ReportFrame.sae_resample import to_j2951_grid
+from Frame.ReportFrame.sae_sidecar import read_trace_columns
+from Frame.ReportFrame.sae_tolerance import summary_values, tolerance_check
+
+
+# Cumulative traces the report GUI plots: (trace key, scale to display units)
+PLOT_TRACES = [
+    ("CE_target_J", 1e-6),
+    ("CE_driven_J", 1e-6),
+    ("D_target_m", 1e-3),
+    ("D_driven_m", 1e-3),
+    ("SE_cum_m2_s2", 1.0),
+]
+# Traces that depend only on the speeds, not on road load / mass
+_SPEED_ONLY = {"D_target_m", "D_driven_m", "SE_cum_m2_s2"}
+
+
+class AnalysisCancelled(Exception):
+    """Raised inside a job when its cancel flag was set"""
+
+
+def plot_pyramids(results, previous=None, check=None):
+    """
+    LOD pyramids of PLOT_TRACES, ready to plot — built on the worker so the
+    GUI thread only reads decimated windows.
+
+    Parameters:
+    - previous: pyramids of the same trace under other parameters; the
+      speed-only ones are reused instead of rebuilt
+    - check: callable raising AnalysisCancelled, called between traces
+
+    Returns:
+    - dict trace key → LODPyramid, or None for results without traces
+      (cache hits)
+    """
+    if not hasattr(results, "traces"):
+        return None
+    out = {}
+    for key, scale in PLOT_TRACES:
+        if previous and key in _SPEED_ONLY and key in previous:
+            out[key] = previous[key]
+            continue
+        if check is not None:
+            check()
+        out[key] = LODPyramid(results.traces[key] * scale)
+    return out
+
+
+def can_rescore(results):
+    """
+    True when results can be re-scored in place: a J2951Result whose speed
+    profiles were kept (analyze_file without a cache hit). A ResultCache
+    hit is a plain dict and needs a fresh analysis instead.
+    """
+    return hasattr(results, "rescore") and "profiles" in vars(results)
+
+
+class AnalysisJob:
+    """One queued file with the parameters it is scored with"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, filepath, ABCs_SI, Mass_kg, align=False, test_info=None):
+        self.job_id = next(self._ids)
+        self.filepath = filepath
+        self.ABCs_SI = np.asarray(ABCs_SI, dtype=float)
+        self.Mass_kg = float(Mass_kg)
+        self.align = align
+        self.test_info = test_info or {}
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check(self):
+        if self.cancel_event.is_set():
+            raise AnalysisCancelled(self.filepath)
+
+    def run(self, cache=None, progress=None):
+        """Returns: (results, loaded, hit) — see analyze_file"""
+        return analyze_file(self, cache, progress)
+
+
+class RescoreJob(AnalysisJob):
+    """
+    Kept results re-scored with new parameters: the speed profiles are
+    reused, only the force / work stage and the energy traces are redone.
+    """
+
+    def __init__(self, results, ABCs_SI, Mass_kg, test_info=None, pyramids=None):
+        test_info = test_info or {}
+        super().__init__(test_info.get("Source file", ""), ABCs_SI, Mass_kg, test_info=test_info)
+        self.base = results
+        self.pyramids = pyramids
+
+    def run(self, cache=None, progress=None):
+        self.check()
+        rescored = self.base.rescore(self.ABCs_SI, self.Mass_kg)
+        self.check()
+        return rescored, {"pyramids": plot_pyramids(rescored, self.pyramids, self.check)}, False
+
+
+def analyze_file(job, cache=None, progress=None):
+    """
+    Read, resample and score one file, checking for cancellation between
+    the stages.
+
+    Parameters:
+    - job: AnalysisJob
+    - cache: optional ResultCache (a hit skips reading the file)
+    - progress: callable(percent, message) or None
+
+    Returns:
+    - (results, loaded, hit): loaded holds time_s / Vs_kph / Vr_kph /
+      tolerance and the plot pyramids (see plot_pyramids), or only
+      pyramids = None on a cache hit
+    """
+    report = progress or (lambda pct, msg: None)
+    loaded = {}
+
+    def compute():
+        job.check()
+        report(20, "Reading CSV file...")
+        # 두 번째부터는 sidecar (.npy) 를 memory-map — text 파싱 없음
+        time_s, Vs_kph, Vr_kph = read_trace_columns(job.filepath)
+
+        job.check()
+        time_s, Vs_kph, Vr_kph, resample_report = to_j2951_grid(time_s, Vs_kph, Vr_kph)
+        if resample_report is not None:
+            report(40, f"Resampled {resample_report['input_rate_hz']:.1f} Hz → 10 Hz "
+                       f"({resample_report['gaps']} gaps, {resample_report['duplicates']} duplicates, "
+                       f"{resample_report['nonfinite']} non-finite values)")
+
+        job.check()
+        report(50, "Calculating SAE J2951 metrics...")
+        results = SAE_J2951.calculate(time_s, Vr_kph, Vs_kph, job.ABCs_SI, job.Mass_kg, align=job.align)
+        # smoothing / speed profiles here, so a later rescore() on the GUI is only the force stage
+        results.profiles
+
+        job.check()
+        report(70, "Checking speed tolerance band...")
+        # 허용 band 이탈은 원래 (정렬 전) trace 기준
+        tolerance = tolerance_check(time_s, Vr_kph, Vs_kph)
+        results.update(summary_values(tolerance))
+        loaded.update(time_s=time_s, Vs_kph=Vs_kph, Vr_kph=Vr_kph, tolerance=tolerance)
+        return results
+
+    if cache is None:
+        results, hit = compute(), False
+    else:
+        report(10, "Checking result cache...")
+        results, hit = cache.get_or_compute(
+            job.filepath, job.ABCs_SI, job.Mass_kg, compute,
+            calculator="SAE_J2951+tol+align" if job.align else "SAE_J2951+tol")
+
+    job.check()
+    report(85, "Preparing trace plots...")
+    loaded["pyramids"] = plot_pyramids(results, check=job.check)
+    return results, loaded, hit
+
+
+class AnalysisWorker:
+    """
+    One daemon thread working through a FIFO of AnalysisJobs.
+
+    Callbacks run on the worker thread; a GUI wraps them in wx.CallAfter:
+    - on_progress(job, percent, message)
+    - on_done(job, results, loaded, hit)
+    - on_error(job, exception)  — AnalysisCancelled for cancelled jobs
+    """
+
+    def __init__(self, on_progress=None, on_done=None, on_error=None, cache=None):
+        self.on_progress = on_progress or (lambda job, pct, msg: None)
+        self.on_done = on_done or (lambda job, results, loaded, hit: None)
+        self.on_error = on_error or (lambda job, exc: None)
+        self.cache = cache
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._waiting = []               # queued, not started (for cancel_all / pending)
+        self.current = None
+        self._thread = threading.Thread(target=self._run, name="j2951-analysis", daemon=True)
+        self._thread.start()
+
+    def submit(self, job):
+        with self._lock:
+            self._waiting.append(job)
+        self._queue.put(job)
+        return job
+
+    def pending(self):
+        """Jobs waiting behind the running one"""
+        with self._lock:
+            return len(self._waiting)
+
+    def cancel_current(self):
+        job = self.current
+        if job is not None:
+            job.cancel()
+
+    def cancel_all(self):
+        with self._lock:
+            for job in self._waiting:
+                job.cancel()
+        self.cancel_current()
+
+    def shutdown(self, wait=False):
+        self.cancel_all()
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self._waiting.remove(job)
+            self.current = job
+            try:
+                job.check()
+                results, loaded, hit = job.run(self.cache, lambda pct, msg: self.on_progress(job, pct, msg))
+                job.check()
+                self.on_progress(job, 100, "Done")
+                self.on_done(job, results, loaded, hit)
+            except Exception as e:
+                self.on_error(job, e)
+            finally:
+                self.current = None
+
+
+def main():
+    """data.csv 3개를 대기열에 넣고 두 번째를 취소 — 순서, 진행률, 취소, worker 쪽 rescore, 다시 연 파일의 rescore 확인"""
+    import os
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data.csv")
+    abc, mass = [35.5, 1.453, 0.03011], 1726.9
+    events = []
+    finished = threading.Event()
+
+    def on_done(job, results, loaded, hit):
+        events.append(("done", job.job_id, float(results["DQM"])))
+        done[job.job_id] = (results, loaded)
+        if job is jobs[-1]:
+            finished.set()
+
+    def on_error(job, exc):
+        events.append(("cancelled" if isinstance(exc, AnalysisCancelled) else "error", job.job_id, repr(exc)))
+        if job is jobs[-1]:
+            finished.set()
+
+    progress = []
+    done = {}
+    jobs = [AnalysisJob(path, abc, mass, align=i == 2) for i in range(3)]
+    worker = AnalysisWorker(on_progress=lambda job, pct, msg: progress.append(pct),
+                            on_done=on_done, on_error=on_error)
+    for job in jobs:
+        worker.submit(job)
+    jobs[1].cancel()
+    if not finished.wait(60):
+        raise AssertionError("worker did not finish")
+
+    # 파라미터 변경: 같은 worker 에서 rescore, 속도만의 trace pyramid 는 재사용
+    results, loaded = done[jobs[0].job_id]
+    if "profiles" not in results.__dict__ or set(loaded["pyramids"]) != {k for k, _ in PLOT_TRACES}:
+        raise AssertionError("profiles and plot pyramids must be prepared on the worker")
+    finished.clear()
+    jobs.append(RescoreJob(results, [40.0, 1.2, 0.035], 1850.0, pyramids=loaded["pyramids"]))
+    worker.submit(jobs[-1])
+    if not finished.wait(60):
+        raise AssertionError("rescore did not finish")
+    worker.shutdown(wait=True)
+    rescored, rescore_loaded = done[jobs[-1].job_id]
+    fresh = SAE_J2951.calculate(loaded["time_s"], loaded["Vr_kph"], loaded["Vs_kph"], [40.0, 1.2, 0.035], 1850.0)
+    if rescored["DQM"] != fresh["DQM"]:
+        raise AssertionError("worker rescore must match a fresh calculate")
+    if rescore_loaded["pyramids"]["D_target_m"] is not loaded["pyramids"]["D_target_m"] \
+            or rescore_loaded["pyramids"]["CE_target_J"] is loaded["pyramids"]["CE_target_J"]:
+        raise AssertionError("only the parameter-dependent pyramids may be rebuilt")
+
+    # 같은 파일을 다시 열어도 rescore 가능해야 함 (GUI worker 는 result cache 없이 동작)
+    again, _, hit = AnalysisJob(path, abc, mass).run()
+    if hit or not can_rescore(again):
+        raise AssertionError("a second load of the same file must keep its speed profiles")
+    if RescoreJob(again, [40.0, 1.2, 0.035], 1850.0).run()[0]["DQM"] != fresh["DQM"]:
+        raise AssertionError("a second load of the same file must re-score like the first")
+    # result cache 를 쓰면 hit 는 plain dict — GUI 의 rescore gate 가 이를 걸러야 함
+    import tempfile
+
+    from Frame.ReportFrame.sae_cache import ResultCache
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResultCache(tmp)
+        AnalysisJob(path, abc, mass).run(cache)
+        cached, cached_loaded, hit = AnalysisJob(path, abc, mass).run(cache)
+    if not hit or can_rescore(cached) or cached_loaded["pyramids"] is not None:
+        raise AssertionError("a result-cache hit must report that it cannot be re-scored")
+
+    kinds = [e[0] for e in events]
+    if kinds != ["done", "cancelled", "done", "done"] or [e[1] for e in events] != [j.job_id for j in jobs]:
+        raise AssertionError(f"unexpected event order: {events}")
+    if progress.count(100) != 3:
+        raise AssertionError(f"progress not reported: {progress}")
+    for e in events:
+        print(f"  job {e[1]}: {e[0]} {e[2] if e[0] == 'done' else ''}")
+    print("✓ jobs run in order off the calling thread; cancelled job skipped; rescore reuses speed-only pyramids; "
+          "a reloaded file can be re-scored")
+
+
+if __name__ == "__main__":
+    main()